@@ -3,14 +3,14 @@ from django.contrib.admin import ModelAdmin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from apps.models import User, Order, Service, Notification, Transaction
+from apps.models import User, Order, Service, Notification, Transaction, OutboxMessage, OrderStat
 
 
 @admin.register(User)
 class UserAdmin(UserAdmin):
     fieldsets = (
         (None, {"fields": ("username", "password")}),
-        (_("Personal info"), {"fields": ("role", "phone", "specialty")}),
+        (_("Personal info"), {"fields": ("role", "phone", "specialty", "specialties")}),
         (
             _("Permissions"),
             {
@@ -23,7 +23,7 @@ class UserAdmin(UserAdmin):
                 ),
             },
         ),
-        (_("Important dates"), {"fields": ("last_login", "date_joined")}),
+        (_("Important dates"), {"fields": ("last_login", "last_seen", "date_joined")}),
     )
     add_fieldsets = (
         (
@@ -34,6 +34,7 @@ class UserAdmin(UserAdmin):
             },
         ),
     )
+    filter_horizontal = "groups", "user_permissions", "specialties"
 
 
 @admin.register(Order)
@@ -54,3 +55,14 @@ class NotificationModelAdmin(ModelAdmin):
 @admin.register(Transaction)
 class TransactionModelAdmin(admin.ModelAdmin):
     list_display = 'status', 'payment_type', 'amount'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageModelAdmin(ModelAdmin):
+    list_display = 'id', 'group', 'created_at'
+
+
+@admin.register(OrderStat)
+class OrderStatModelAdmin(ModelAdmin):
+    list_display = 'day', 'service', 'worker', 'status', 'count', 'total'
+    list_filter = 'status',
@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.utils.user_cache import get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user taken from the process local user cache,
+    a repeated request with the same token doesn't query the users table.
+    Hits are checked against the shared user version, a user deactivated in another process
+    is rejected on the next request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = get_cached_user(user_id, validated_token.get("iat"))
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -1,25 +1,166 @@
-import ujson
+import asyncio
+from collections import Counter
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from ujson import JSONDecodeError
+from django.conf import settings
+
+from apps.utils.codecs import json_codec, msgpack_codec, event_content
+from apps.utils.presence import presence
+from apps.utils.rate_limit import TokenBucket
+
+# Process wide counters: dropped_messages, slow_consumer_disconnects
+ws_stats = Counter()
+
+
+def rate_limit_setting(name: str, default):
+    return getattr(settings, 'WS_RATE_LIMIT', {}).get(name, default)
 
 
 class CustomAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
+    # user_id -> [TokenBucket, connections count], shared by all connections of the user in this process
+    user_buckets = {}
+    # codecs negotiated by WebSocket subprotocol, JSON text frames are used when none is offered
+    subprotocol_codecs = msgpack_codec,
+    default_codec = json_codec
+
+    async def websocket_connect(self, message):
+        self.codec = self.select_codec()
+        self.bucket = TokenBucket(rate_limit_setting('RATE', 5), rate_limit_setting('BURST', 20))
+        self.dropped_messages = 0
+        self.send_queue = asyncio.Queue(maxsize=rate_limit_setting('MAX_SEND_QUEUE', 100))
+        self.slow_consumer = False
+        self.writer = asyncio.create_task(self.write_frames())
+        await super().websocket_connect(message)
+
+    async def websocket_receive(self, message):
+        if not self.allow_message():
+            self.dropped_messages += 1
+            ws_stats['dropped_messages'] += 1
+            return
+        await super().websocket_receive(message)
+
+    async def websocket_disconnect(self, message):
+        self.writer.cancel()
+        self.release_user_bucket()
+        await super().websocket_disconnect(message)
+
+    def get_user_bucket(self):
+        user = self.scope.get('user')
+        if user is None or user.is_anonymous:
+            return None
+        if getattr(self, 'user_bucket_id', None) is None:
+            self.user_bucket_id = user.pk
+            entry = self.user_buckets.get(user.pk)
+            if entry is None:
+                bucket = TokenBucket(rate_limit_setting('USER_RATE', 10), rate_limit_setting('USER_BURST', 40))
+                entry = self.user_buckets[user.pk] = [bucket, 0]
+            entry[1] += 1
+        return self.user_buckets[self.user_bucket_id][0]
+
+    def release_user_bucket(self):
+        user_id = getattr(self, 'user_bucket_id', None)
+        entry = self.user_buckets.get(user_id)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self.user_buckets[user_id]
+
+    def allow_message(self) -> bool:
+        user_bucket = self.get_user_bucket()
+        if user_bucket is not None and not user_bucket.has_token():
+            return False
+        if not self.bucket.consume():
+            return False
+        if user_bucket is not None:
+            user_bucket.consume()
+        return True
+
+    async def queue_send(self, text_data=None, bytes_data=None):
+        """
+        Send a broadcast frame through the bounded send queue.
+        A client that can't keep up is disconnected instead of growing the queue.
+        """
+        if self.slow_consumer:
+            return
+        try:
+            self.send_queue.put_nowait((text_data, bytes_data))
+        except asyncio.QueueFull:
+            self.slow_consumer = True
+            ws_stats['slow_consumer_disconnects'] += 1
+            self.writer.cancel()
+            await self.close(code=4008)
+
+    async def write_frames(self):
+        while True:
+            text_data, bytes_data = await self.send_queue.get()
+            await self.send(text_data=text_data, bytes_data=bytes_data)
+
+    def select_codec(self):
+        offered = self.scope.get('subprotocols') or []
+        for codec in self.subprotocol_codecs:
+            if codec.name in offered:
+                return codec
+        return self.default_codec
+
+    async def accept(self, subprotocol=None, headers=None):
+        if subprotocol is None and self.codec is not self.default_codec:
+            subprotocol = self.codec.name
+        await super().accept(subprotocol, headers)
+
+    def encode_frame(self, content) -> tuple:
+        """
+        Encode content with the connection codec and return (text_data, bytes_data).
+        """
+        data = self.codec.encode(content)
+        return (None, data) if self.codec.binary else (data, None)
+
+    def decode_frame(self, text_data=None, bytes_data=None):
+        if bytes_data is not None and self.codec.binary:
+            return self.codec.decode(bytes_data)
+        if text_data is None:
+            raise ValueError("Empty frame")
+        return self.default_codec.decode(text_data)
 
     async def receive(self, text_data=None, bytes_data=None, **kwargs):
         try:
-            ujson.loads(text_data)
-        except JSONDecodeError:
+            content = self.decode_frame(text_data, bytes_data)
+        except self.codec.errors + self.default_codec.errors:
             await self.send_json({"message": "Send message in json format!"})
         else:
-            return await super().receive(text_data, bytes_data, **kwargs)
+            if isinstance(content, dict) and content.get("type") == "heartbeat":
+                await self.heartbeat()
+                return
+            await self.receive_json(content, **kwargs)
+
+    async def send_json(self, content, close=False):
+        text_data, bytes_data = self.encode_frame(content)
+        await self.send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+    async def queue_json(self, content):
+        text_data, bytes_data = self.encode_frame(content)
+        await self.queue_send(text_data=text_data, bytes_data=bytes_data)
+
+    async def queue_event(self, event):
+        """
+        Forward a broadcast event, the pre-encoded frame is used when the sender attached one.
+        """
+        frame = event.get('frames', {}).get(self.codec.name)
+        if frame is None:
+            await self.queue_json(event_content(event))
+        elif self.codec.binary:
+            await self.queue_send(bytes_data=frame)
+        else:
+            await self.queue_send(text_data=frame)
 
     @classmethod
     async def decode_json(cls, text_data):
-        return ujson.loads(text_data)
+        return cls.default_codec.decode(text_data)
 
     @classmethod
     async def encode_json(cls, content):
-        return ujson.dumps(content)
+        return cls.default_codec.encode(content)
 
     async def is_authenticate(self) -> bool:
         if self.user.is_anonymous:
@@ -30,6 +171,19 @@ class CustomAsyncJsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
         return True
 
     async def update_user_status(self, is_online: bool = True):
-        user = self.user
-        user.is_online = is_online
-        await user.asave()
+        if is_online:
+            await presence.connect(self.user.pk)
+        else:
+            await presence.disconnect(self.user.pk)
+        await self.flush_presence()
+
+    async def heartbeat(self):
+        user = self.scope.get('user')
+        if user is None or user.is_anonymous:
+            return
+        await presence.touch(user.pk)
+        await self.flush_presence()
+
+    async def flush_presence(self):
+        if presence.flush_due():
+            await database_sync_to_async(presence.flush_last_seen)()
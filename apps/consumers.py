@@ -1,6 +1,21 @@
-import json
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.db.models import Q
 
 from apps.base import CustomAsyncJsonWebsocketConsumer
+from apps.models import Notification, User
+from apps.utils.codecs import attach_frames
+
+# Reconnect paytida yuboriladigan eng ko'p xabarlar soni, undan ko'p bo'lsa replay_truncated yuboriladi,
+# qolganini /notifications/ dan olish mumkin
+REPLAY_LIMIT = 500
+# id tartibi commit tartibi emas: kichik id li xabar since dan keyin commit bo'lishi mumkin,
+# shuning uchun since xabaridan oldingi shuncha vaqt ichida yaratilganlar ham qayta yuboriladi
+REPLAY_WINDOW = timedelta(seconds=30)
+# Bitta ulanish obuna bo'lishi mumkin bo'lgan servislar soni
+MAX_SERVICE_SUBSCRIPTIONS = 50
 
 
 class OrderConsumer(CustomAsyncJsonWebsocketConsumer):
@@ -14,35 +29,126 @@ class OrderConsumer(CustomAsyncJsonWebsocketConsumer):
         self.user_group = f"user_{self.user.id}"
 
         self.role_group = f"{self.role}_group"
+        self.replayed_ids = set()
+        self.service_ids = set()
 
         await self.channel_layer.group_add(self.user_group, self.channel_name)
         await self.channel_layer.group_add(self.role_group, self.channel_name)
+        await self.update_user_status(is_online=True)
+        if self.user.role == User.Role.WORKER:
+            await self.subscribe_services(await self.get_worker_services())
+
+        since = self.get_since()
+        if since is not None:
+            await self.replay_missed(since)
+
+    def get_since(self):
+        query_params = parse_qs(self.scope["query_string"].decode("utf8"))
+        try:
+            return int(query_params["since"][0])
+        except (KeyError, ValueError):
+            return None
+
+    async def replay_missed(self, since: int):
+        """
+        Stream notifications missed after `since` before live events resume, in the live frame shape.
+        Ids are assigned at insert but become visible at commit, so a row with an id below `since`
+        can commit after the client saw `since`: rows created within REPLAY_WINDOW before it are
+        sent again and clients drop ids they already have.
+        Groups are joined before the replay, so nothing is lost in between,
+        live duplicates of the replayed rows are skipped in send_message.
+        When more than REPLAY_LIMIT are missed, a replay_truncated frame tells the client
+        to load the rest after `last_id` from /notifications/.
+        """
+        is_admin = self.user.is_admin()
+        notifications = await self.get_missed(since, is_admin)
+        for notification in notifications[:REPLAY_LIMIT]:
+            if is_admin:
+                notification['message'] = f"[ADMIN LOG] {notification['message']}"
+            self.replayed_ids.add(notification['id'])
+            await self.send_json(notification)
+        if len(notifications) > REPLAY_LIMIT:
+            await self.send_json({"type": "replay_truncated", "last_id": notifications[REPLAY_LIMIT - 1]['id']})
+
+    @database_sync_to_async
+    def get_missed(self, since: int, is_admin: bool) -> list:
+        queryset = Notification.objects.order_by('id')
+        if not is_admin:
+            queryset = queryset.filter(receiver_id=self.user.id)
+        missed = Q(id__gt=since)
+        seen_at = queryset.filter(id__lte=since).values_list('created_at', flat=True).last()
+        if seen_at is not None:
+            missed |= Q(id__lt=since, created_at__gte=seen_at - REPLAY_WINDOW)
+        return list(queryset.filter(missed).values('id', 'order_id', 'status', 'message')[:REPLAY_LIMIT + 1])
+
+    @database_sync_to_async
+    def get_worker_services(self) -> list:
+        queryset = User.specialties.through.objects.filter(user_id=self.user.id).values_list('service_id', flat=True)
+        return list(queryset[:MAX_SERVICE_SUBSCRIPTIONS])
+
+    async def subscribe_services(self, service_ids):
+        for service_id in service_ids:
+            if len(self.service_ids) >= MAX_SERVICE_SUBSCRIPTIONS:
+                break
+            if service_id not in self.service_ids:
+                self.service_ids.add(service_id)
+                await self.channel_layer.group_add(f"service_{service_id}", self.channel_name)
+
+    async def unsubscribe_services(self, service_ids):
+        for service_id in service_ids:
+            if service_id in self.service_ids:
+                self.service_ids.discard(service_id)
+                await self.channel_layer.group_discard(f"service_{service_id}", self.channel_name)
 
     async def disconnect(self, close_code):
+        if not hasattr(self, 'role_group'):
+            return
         await self.channel_layer.group_discard(self.user_group, self.channel_name)
         await self.channel_layer.group_discard(self.role_group, self.channel_name)
+        await self.unsubscribe_services(list(self.service_ids))
+        await self.update_user_status(is_online=False)
 
-    async def receive(self, text_data):
-        if not text_data:
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            await self.send_json({"error": "Invalid message format"})
             return
 
-        try:
-            data = json.loads(text_data)
-            message = data.get("message")
-            if message:
-                await self.channel_layer.group_send(
-                    self.role_group,
-                    {
-                        "type": "send_message",
-                        "message": message
-                    }
-                )
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
-                "error": "Invalid JSON format"
-            }))
+        action = content.get("action")
+        if action in ("subscribe", "unsubscribe"):
+            await self.change_subscriptions(action, content.get("services"))
+            return
+
+        message = content.get("message")
+        if message:
+            await self.channel_layer.group_send(
+                self.role_group,
+                attach_frames({
+                    "type": "send_message",
+                    "message": message
+                })
+            )
+
+    async def change_subscriptions(self, action: str, services):
+        """
+        {"action": "subscribe" | "unsubscribe", "services": [1, 2]}
+        """
+        if self.user.role not in (User.Role.WORKER, User.Role.ADMIN):
+            await self.send_json({"error": "Faqat ishchilar servislarga obuna bo'la oladi"})
+            return
+        if not isinstance(services, list) or not all(isinstance(service_id, int) for service_id in services):
+            await self.send_json({"error": "services must be a list of ids"})
+            return
+        if action == "subscribe":
+            await self.subscribe_services(services)
+        else:
+            await self.unsubscribe_services(services)
+        await self.send_json({"services": sorted(self.service_ids)})
+
+    async def order_created(self, event):
+        await self.queue_event(event)
 
     async def send_message(self, event):
-        await self.send(text_data=json.dumps({
-            "message": event["message"]
-        }))
+        event_id = event.get("id")
+        if event_id is not None and event_id in self.replayed_ids:
+            return
+        await self.queue_event(event)
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.management.commands.ws_loadtest import percentile
+from apps.models import User, Service, Order, Notification, Transaction
+
+# (sync url name, async url name, kwargs)
+ENDPOINTS = {
+    "orders": ("orders-list", "async_orders", {}),
+    "order": ("orders-detail", "async_order_detail", {"pk": None}),
+    "notifications": ("notifications", "async_notifications", {}),
+    "check-order": ("check_order", "async_check_order", {"order_id": None}),
+    "me": ("me", "async_me", {}),
+}
+
+
+class Command(BaseCommand):
+    help = ("Sinxron DRF va asinxron (ASGI) o'qish endpointlarini parallel so'rovlar ostida solishtirish: "
+            "so'rov/sekund va kechikish")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=200, help="Test uchun yaratiladigan buyurtmalar soni")
+        parser.add_argument('--endpoint', choices=list(ENDPOINTS), action='append',
+                            help="Faqat shu endpointlar (bir necha marta berish mumkin)")
+        parser.add_argument('--keep', action='store_true', help="Test ma'lumotlarini o'chirmaslik")
+
+    def handle(self, *args, **options):
+        prefix = f"bench_{uuid.uuid4().hex[:8]}"
+        data = self.create_data(prefix, options['orders'])
+        try:
+            report = asyncio.run(self.run(data, options))
+        finally:
+            if not options['keep']:
+                self.cleanup(prefix)
+        for line in report:
+            self.stdout.write(line)
+
+    def create_data(self, prefix: str, count: int) -> dict:
+        client = User.objects.create(username=f"{prefix}_client", role=User.Role.CLIENT)
+        service = Service.objects.create(name=f"{prefix}_service", base_price=1000)
+        orders = Order.objects.bulk_create([
+            Order(client=client, service=service, price=1000, description=f"{prefix} {index}") for index in range(count)
+        ])
+        Notification.objects.bulk_create([
+            Notification(receiver=client, message=f"{prefix} {order.id}") for order in orders
+        ])
+        Transaction.objects.create(user=client, order=orders[0], amount=1000,
+                                   payment_type=Transaction.PaymentType.CLICK)
+        return {"client": client, "order": orders[0]}
+
+    def cleanup(self, prefix: str):
+        Order.objects.filter(client__username=f"{prefix}_client").delete()
+        User.objects.filter(username__startswith=prefix).delete()
+        Service.objects.filter(name=f"{prefix}_service").delete()
+
+    def url(self, name: str, kwargs: dict, order_id: int) -> str:
+        return reverse(name, kwargs={key: order_id for key in kwargs})
+
+    async def load(self, client, url: str, headers: dict, total: int, concurrency: int) -> tuple:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = set()
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses.add(response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - started, latencies, statuses
+
+    async def run(self, data: dict, options: dict) -> list:
+        token = await sync_to_async(AccessToken.for_user)(data["client"])
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        total, concurrency = options['requests'], options['concurrency']
+        report = [f"requests: {total}, concurrency: {concurrency}"]
+        for name in options['endpoint'] or ENDPOINTS:
+            sync_name, async_name, kwargs = ENDPOINTS[name]
+            for label, url_name in (("sync", sync_name), ("async", async_name)):
+                url = self.url(url_name, kwargs, data["order"].id)
+                await client.get(url, headers=headers)  # warm up (user cache, connections)
+                elapsed, latencies, statuses = await self.load(client, url, headers, total, concurrency)
+                report.append(
+                    f"{name:<14} {label:<5} {total / elapsed:8.1f} req/s  p50 {percentile(latencies, 50):7.2f} ms  "
+                    f"p99 {percentile(latencies, 99):7.2f} ms  status {sorted(statuses)}"
+                )
+        return report
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.consumers import OrderConsumer
+from apps.utils.codecs import attach_frames, json_codec, msgpack_codec
+
+
+class Command(BaseCommand):
+    help = "Bitta group_send eventi uchun N ta obunachida sarflanadigan CPU vaqtini o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=100)
+        parser.add_argument('--codec', choices=[json_codec.name, msgpack_codec.name], default=json_codec.name)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options['subscribers'], options['events'], options['codec']))
+
+    def make_consumer(self, codec):
+        consumer = OrderConsumer()
+        consumer.codec = codec
+        consumer.replayed_ids = set()
+        consumer.slow_consumer = False
+        consumer.send_queue = asyncio.Queue()
+        return consumer
+
+    async def measure(self, consumers, events: int, pre_encode: bool) -> float:
+        started = time.process_time()
+        for event_id in range(events):
+            event = {
+                "type": "send_message",
+                "id": event_id,
+                "message": f"Sizning buyurtmangiz ({event_id}) yakunlandi ✅.",
+            }
+            if pre_encode:
+                event = attach_frames(event)
+            for consumer in consumers:
+                await consumer.send_message(event)
+        elapsed = time.process_time() - started
+        for consumer in consumers:
+            while not consumer.send_queue.empty():
+                consumer.send_queue.get_nowait()
+        return elapsed / events
+
+    async def run(self, subscribers: int, events: int, codec_name: str):
+        codec = msgpack_codec if codec_name == msgpack_codec.name else json_codec
+        consumers = [self.make_consumer(codec) for _ in range(subscribers)]
+
+        before = await self.measure(consumers, events, pre_encode=False)
+        after = await self.measure(consumers, events, pre_encode=True)
+
+        self.stdout.write(f"codec={codec.name} subscribers={subscribers} events={events}")
+        self.stdout.write(f"per recipient encode: {before * 1000:.3f} ms CPU / event")
+        self.stdout.write(f"pre-encoded frame:    {after * 1000:.3f} ms CPU / event")
+        if after:
+            self.stdout.write(f"speedup: {before / after:.2f}x")
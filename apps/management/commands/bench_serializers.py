@@ -0,0 +1,91 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.models import User, Service, Order, Notification, Transaction
+from apps.serializers import (OrderSerializer, TransactionListModelSerializer, OrderFlatSerializer,
+                              NotificationFlatSerializer, TransactionListFlatSerializer)
+from apps.serializers.user_serializers import NotificationSerializer
+
+
+class Command(BaseCommand):
+    help = ("Ro'yxat endpointlari serializatsiyasini solishtirish: DRF ModelSerializer (model obyektlari) va "
+            "values() asosidagi FlatSerializer, qator/sekund")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Test uchun yaratiladigan qatorlar soni")
+        parser.add_argument('--repeat', type=int, default=3, help="Har bir o'lchov necha marta (eng yaxshisi olinadi)")
+        parser.add_argument('--keep', action='store_true', help="Test ma'lumotlarini o'chirmaslik")
+
+    def handle(self, *args, **options):
+        prefix = f"bench_{uuid.uuid4().hex[:8]}"
+        client = self.create_data(prefix, options['rows'])
+        try:
+            report = self.run(client, options['rows'], options['repeat'])
+        finally:
+            if not options['keep']:
+                self.cleanup(prefix)
+        for line in report:
+            self.stdout.write(line)
+
+    def create_data(self, prefix: str, count: int) -> User:
+        client = User.objects.create(username=f"{prefix}_client", role=User.Role.CLIENT)
+        worker = User.objects.create(username=f"{prefix}_worker", role=User.Role.WORKER)
+        service = Service.objects.create(name=f"{prefix}_service", base_price=1000)
+        orders = Order.objects.bulk_create([
+            Order(client=client, worker=worker if index % 2 else None, service=service, price=1000,
+                  description=f"{prefix} {index}") for index in range(count)
+        ])
+        Notification.objects.bulk_create([
+            Notification(sender=worker, receiver=client, message=f"{prefix} {order.id}") for order in orders
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(user=client, order=order, amount=1000, payment_type=Transaction.PaymentType.CLICK)
+            for order in orders
+        ])
+        return client
+
+    def cleanup(self, prefix: str):
+        Order.objects.filter(client__username=f"{prefix}_client").delete()
+        User.objects.filter(username__startswith=prefix).delete()
+        Service.objects.filter(name=f"{prefix}_service").delete()
+
+    def cases(self, client: User) -> list:
+        """
+        [(name, queryset, DRF serializer factory, flat serializer)], querysets as the list views build them.
+        """
+        orders = Order.objects.filter(client=client).order_by('-created_at', '-id')
+        notifications = Notification.objects.filter(receiver=client).order_by('-created_at', '-id')
+        transactions = Transaction.objects.filter(user=client).order_by('-created_at')
+        return [
+            ("orders", orders.select_related('service').defer('search_vector'),
+             lambda rows: OrderSerializer(rows, many=True), OrderFlatSerializer()),
+            ("orders ?service_format=id", orders.defer('search_vector'),
+             lambda rows: OrderSerializer(rows, many=True, nested_service=False),
+             OrderFlatSerializer(nested_service=False)),
+            ("notifications", notifications.select_related('sender', 'receiver'),
+             lambda rows: NotificationSerializer(rows, many=True), NotificationFlatSerializer()),
+            ("transactions", transactions,
+             lambda rows: TransactionListModelSerializer(rows, many=True), TransactionListFlatSerializer()),
+        ]
+
+    def measure(self, function, repeat: int) -> float:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def run(self, client: User, rows: int, repeat: int) -> list:
+        report = [f"rows: {rows}, repeat: {repeat}"]
+        for name, queryset, serializer, flat in self.cases(client):
+            model = self.measure(lambda: serializer(list(queryset.all())).data, repeat)
+            values = self.measure(lambda: flat.to_representation(flat.values(queryset.all())), repeat)
+            report.append(
+                f"{name:<26} model {rows / model:10.0f} rows/s  values {rows / values:10.0f} rows/s  "
+                f"x{model / values:.1f}"
+            )
+        return report
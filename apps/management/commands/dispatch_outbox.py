@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.utils.outbox import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = "Outboxda qolib ketgan xabarlarni channel layerga yuborish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash")
+        parser.add_argument('--interval', type=float, default=1.0, help="Loop rejimida kutish (sekund)")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = dispatch_outbox(options['batch_size'])
+            if sent:
+                self.stdout.write(f"{sent} ta xabar yuborildi")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
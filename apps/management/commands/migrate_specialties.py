@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.models import User, Service
+from apps.utils.worker_feed import rebuild_worker
+
+
+class Command(BaseCommand):
+    help = "Ishchilarning matnli `specialty` qiymatlarini `specialties` (User <-> Service) bog'lanishiga o'tkazish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        services = list(Service.objects.values_list('id', 'name'))
+        Through = User.specialties.through
+        links = []
+        workers = User.objects.filter(role=User.Role.WORKER).exclude(specialty__isnull=True).exclude(specialty='')
+        for user_id, specialty in workers.values_list('id', 'specialty').iterator():
+            terms = [term.strip().lower() for term in specialty.split(',') if term.strip()]
+            for service_id, name in services:
+                if any(term in name.lower() for term in terms):
+                    links.append(Through(user_id=user_id, service_id=service_id))
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(links)} ta bog'lanish yaratiladi")
+            transaction.set_rollback(True)
+            return
+        Through.objects.bulk_create(links, ignore_conflicts=True, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"{len(links)} ta bog'lanish yaratildi"))
+        # bulk_create doesn't send m2m_changed, so the feeds are rebuilt here
+        worker_ids = sorted({link.user_id for link in links})
+        entries = sum(rebuild_worker(worker_id) for worker_id in worker_ids)
+        self.stdout.write(self.style.SUCCESS(f"{len(worker_ids)} ta ishchi lentasi qayta qurildi: {entries} ta buyurtma"))
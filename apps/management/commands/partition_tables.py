@@ -0,0 +1,209 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.models import Order, Notification
+
+TABLES = {
+    'orders': Order,
+    'notifications': Notification,
+}
+PARTITION_KEY = 'created_at'
+
+
+def month_start(value: datetime, shift: int = 0) -> datetime:
+    month = value.year * 12 + value.month - 1 + shift
+    return timezone.make_aware(datetime(month // 12, month % 12 + 1, 1))
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+class Command(BaseCommand):
+    help = ("orders va notifications jadvallarini created_at bo'yicha oylik bo'limlarga (PostgreSQL declarative "
+            "partitioning) ajratish, kelgusi oylar uchun bo'lim yaratish va eski bo'limlarni ajratib olish. "
+            "Oylik bo'limi yo'q qatorlar DEFAULT bo'limga tushadi, `create` ularni yangi bo'limga ko'chiradi. "
+            "DIQQAT: convert jadvalga ishora qiluvchi foreign key larni olib tashlaydi (apps_order uchun: "
+            "apps_transaction.order_id, apps_workerfeedentry.order_id, apps_notification.order_id), ular qayta "
+            "yaratilmaydi, Django migratsiyalari esa ularni bor deb hisoblaydi; o'chirishlarni Django o'zi "
+            "bajaradi. --dry-run bilan avval SQL ni ko'rib chiqing")
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['convert', 'create', 'detach'],
+                            help="convert - jadvalni bir marta partitioned ga o'tkazish, "
+                                 "create - kelgusi oylar bo'limlari (cron orqali muntazam), "
+                                 "detach - eski bo'limlarni ajratish")
+        parser.add_argument('--table', choices=list(TABLES), action='append',
+                            help="Faqat shu jadval (bir necha marta berish mumkin)")
+        parser.add_argument('--months-ahead', type=int, default=3)
+        parser.add_argument('--older-than', type=int, default=12, help="detach: shuncha oydan eski bo'limlar")
+        parser.add_argument('--drop', action='store_true', help="detach: ajratilgan bo'limni o'chirish")
+        parser.add_argument('--keep-old', action='store_true',
+                            help="convert: eski jadvalni <table>_old nomi bilan qoldirish")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="O'zgartiruvchi SQL ni bajarmasdan chiqarish")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning faqat PostgreSQL da ishlaydi")
+        self.dry_run = options['dry_run']
+        for name in options['table'] or TABLES:
+            table = TABLES[name]._meta.db_table
+            with transaction.atomic():
+                if options['action'] == 'convert':
+                    self.convert(table, options['months_ahead'], options['keep_old'])
+                elif options['action'] == 'create':
+                    self.create_partitions(table, timezone.now(), options['months_ahead'], check=True)
+                else:
+                    self.detach(table, options['older_than'], options['drop'])
+
+    def run(self, cursor, sql: str, params=None) -> None:
+        """
+        Executes a statement that changes the schema or the data, with --dry-run only prints it.
+        """
+        if self.dry_run:
+            self.stdout.write(connection.ops.compose_sql(sql, params) + ';')
+        else:
+            cursor.execute(sql, params)
+
+    def is_partitioned(self, cursor, table: str) -> bool:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+        return bool(row) and row[0] == 'p'
+
+    def exists(self, cursor, name: str) -> bool:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        return cursor.fetchone()[0]
+
+    def create_partitions(self, table: str, since: datetime, months_ahead: int, check: bool = False) -> None:
+        """
+        Monthly partitions from `since` to `months_ahead` months after the current one, and the DEFAULT
+        partition, so inserts don't fail when the cron run is missed. Rows that landed in the DEFAULT
+        partition are moved into the new monthly partition before it is attached.
+        """
+        quote = connection.ops.quote_name
+        end = month_start(timezone.localtime(), months_ahead + 1)
+        start = month_start(timezone.localtime(since))
+        default = default_partition_name(table)
+        with connection.cursor() as cursor:
+            if check and not self.is_partitioned(cursor, table):
+                raise CommandError(f"{table} partitioned emas, avval `partition_tables convert` ishga tushiring")
+            has_default = self.exists(cursor, default)
+            while start < end:
+                next_start = month_start(start, 1)
+                name = partition_name(table, start)
+                if not self.exists(cursor, name):
+                    self.run(cursor, f"CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS "
+                                     f"INCLUDING CONSTRAINTS)")
+                    if has_default:
+                        self.run(
+                            cursor,
+                            f"WITH moved AS (DELETE FROM {quote(default)} WHERE {quote(PARTITION_KEY)} >= %s "
+                            f"AND {quote(PARTITION_KEY)} < %s RETURNING *) INSERT INTO {quote(name)} "
+                            f"SELECT * FROM moved", [start, next_start]
+                        )
+                    self.run(cursor, f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} "
+                                     f"FOR VALUES FROM (%s) TO (%s)", [start, next_start])
+                start = next_start
+            if not has_default:
+                self.run(cursor, f"CREATE TABLE {quote(default)} PARTITION OF {quote(table)} DEFAULT")
+        self.stdout.write(f"{table}: bo'limlar {end:%Y-%m} gacha tayyor")
+
+    def convert(self, table: str, months_ahead: int, keep_old: bool) -> None:
+        """
+        Copies the table into a new one partitioned by month on created_at.
+        The primary key becomes (id, created_at), a partitioned table can't have a unique key without
+        the partition key, so foreign keys pointing to the table are dropped and not re-created.
+        Django still cascades the deletes itself, but the migration state keeps those constraints.
+        """
+        quote = connection.ops.quote_name
+        old = f"{table}_old"
+        sequence = f"{table}_partitioned_id_seq"
+        with connection.cursor() as cursor:
+            if self.is_partitioned(cursor, table):
+                self.stdout.write(f"{table} allaqachon partitioned")
+                return
+            self.run(cursor, f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+                "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+                [table, table],
+            )
+            indexes = cursor.fetchall()
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass "
+                "AND contype = 'f'", [table]
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(
+                "SELECT conname, conrelid::regclass::text FROM pg_constraint WHERE confrelid = %s::regclass "
+                "AND contype = 'f'", [table]
+            )
+            referencing = cursor.fetchall()
+            cursor.execute(f"SELECT min({quote(PARTITION_KEY)}), max(id), count(*) FROM {quote(table)}")
+            first, max_id, count = cursor.fetchone()
+
+            for name, referencing_table in referencing:
+                self.run(cursor, f"ALTER TABLE {quote(referencing_table)} DROP CONSTRAINT {quote(name)}")
+                self.stdout.write(self.style.WARNING(
+                    f"{referencing_table}.{name} foreign key olib tashlandi va qayta yaratilmaydi"
+                ))
+            for name, _ in indexes:
+                self.run(cursor, f"DROP INDEX {quote(name)}")
+            for name, _ in foreign_keys:
+                self.run(cursor, f"ALTER TABLE {quote(table)} DROP CONSTRAINT {quote(name)}")
+            self.run(cursor, f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+            self.run(cursor, f"ALTER TABLE {quote(old)} RENAME CONSTRAINT {quote(table + '_pkey')} "
+                             f"TO {quote(old + '_pkey')}")
+
+            self.run(
+                cursor,
+                f"CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                f"PARTITION BY RANGE ({quote(PARTITION_KEY)})"
+            )
+            # the id default (serial or identity) belongs to the old table
+            self.run(cursor, f"ALTER TABLE {quote(table)} ALTER COLUMN id DROP DEFAULT")
+            self.run(cursor, f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.id")
+            self.run(cursor, f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)",
+                     [sequence])
+            self.run(cursor, f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} "
+                             f"PRIMARY KEY (id, {quote(PARTITION_KEY)})")
+
+            self.create_partitions(table, first or timezone.now(), months_ahead)
+
+            self.run(cursor, f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)}")
+            self.run(cursor, "SELECT setval(%s::regclass, %s, %s)", [sequence, max_id or 1, max_id is not None])
+            # created on the parent, postgres creates them on every partition
+            for _, definition in indexes:
+                self.run(cursor, definition)
+            for name, definition in foreign_keys:
+                self.run(cursor, f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+            if not keep_old:
+                self.run(cursor, f"DROP TABLE {quote(old)}")
+        self.stdout.write(self.style.SUCCESS(f"{table}: {count} ta qator oylik bo'limlarga ko'chirildi"))
+
+    def detach(self, table: str, older_than: int, drop: bool) -> None:
+        quote = connection.ops.quote_name
+        cutoff = month_start(timezone.localtime(), -older_than)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname", [table]
+            )
+            partitions = [name for name, in cursor.fetchall()]
+            for name in partitions:
+                if name == default_partition_name(table) or name >= partition_name(table, cutoff):
+                    continue
+                self.run(cursor, f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+                state = "ajratildi"
+                if drop:
+                    self.run(cursor, f"DROP TABLE {quote(name)}")
+                    state = "o'chirildi"
+                self.stdout.write(f"{name} {state}")
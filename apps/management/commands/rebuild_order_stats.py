@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.utils.order_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Buyurtmalar statistikasi (OrderStat) jadvalini orders jadvalidan qaytadan hisoblash"
+
+    def handle(self, *args, **options):
+        created = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{created} ta statistika qatori yaratildi"))
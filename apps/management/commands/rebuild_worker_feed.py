@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.utils.worker_feed import rebuild_all, rebuild_worker
+
+
+class Command(BaseCommand):
+    help = "Ishchilarning bo'sh buyurtmalar feedini orders jadvalidan qaytadan qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker', type=int, help="Faqat bitta ishchi uchun")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['worker']:
+            created = rebuild_worker(options['worker'])
+        else:
+            created = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"{created} ta feed yozuvi yaratildi"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.models import Order, Service
+from apps.utils.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Buyurtmalarning qidiruv vektorini (search_vector) qaytadan hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Bitta UPDATE dagi buyurtmalar soni")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Qidiruv faqat PostgreSQL da ishlaydi")
+        batch_size = options['batch_size']
+        updated = 0
+        for service_id, name in Service.objects.values_list('id', 'name').iterator():
+            orders = Order.objects.filter(service_id=service_id)
+            last_id = 0
+            # id ranges keep every UPDATE (and its locks) short
+            while True:
+                ids = list(orders.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                updated += update_search_vector(Order.objects.filter(id__in=ids), name)
+                last_id = ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta buyurtma yangilandi"))
@@ -0,0 +1,157 @@
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+import ujson
+from asgiref.sync import sync_to_async
+from channels.layers import channel_layers
+from asgiref.local import Local
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.models import User, Service, Order
+
+
+def percentile(values: list, percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = ("OrderConsumer uchun yuklama testi: ko'p sonli WebSocket ulanishlarni ochadi, "
+            "buyurtma yaratib/holatini o'zgartirib yetkazish kechikishini o'lchaydi")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=20)
+        parser.add_argument('--role', choices=[User.Role.ADMIN, User.Role.WORKER], default=User.Role.ADMIN,
+                            help="admin: har bir event hamma ulanishga boradi, worker: faqat buyurtma ishchisiga")
+        parser.add_argument('--transitions', action='store_true', help="Buyurtmalarni in_process/completed qilish")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Oxirgi xabarlarni kutish (sekund)")
+        parser.add_argument('--redis', action='store_true',
+                            help="settings.CHANNEL_LAYERS va CACHES ishlatiladi, aks holda InMemoryChannelLayer va LocMemCache")
+        parser.add_argument('--keep', action='store_true', help="Test ma'lumotlarini o'chirmaslik")
+
+    def handle(self, *args, **options):
+        if not options['redis']:
+            settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+            # in-memory layer works only inside this event loop, so the outbox is drained inline
+            settings.OUTBOX = {**getattr(settings, 'OUTBOX', {}), 'DISPATCH_IN_THREAD': False}
+            channel_layers.backends = {}
+            # presence, user_cache and unread counters use the default cache, so Redis isn't needed either
+            settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+            caches._settings = caches.settings = caches.configure_settings(None)
+            caches._connections = Local()
+        settings.WS_RATE_LIMIT = {**getattr(settings, 'WS_RATE_LIMIT', {}), 'MAX_SEND_QUEUE': 10_000}
+
+        from root.asgi import application
+
+        prefix = f"loadtest_{uuid.uuid4().hex[:8]}"
+        users = self.create_users(prefix, options['connections'], options['role'])
+        try:
+            report = asyncio.run(self.run(application, users, options))
+        finally:
+            if not options['keep']:
+                self.cleanup(prefix)
+        for line in report:
+            self.stdout.write(line)
+
+    def create_users(self, prefix: str, count: int, role: str) -> dict:
+        client = User.objects.create(username=f"{prefix}_client", role=User.Role.CLIENT)
+        # orders without a worker don't produce notifications
+        worker = User.objects.create(username=f"{prefix}_worker", role=User.Role.WORKER)
+        service = Service.objects.create(name=f"{prefix}_service", base_price=1000)
+        subscribers = User.objects.bulk_create([
+            User(username=f"{prefix}_{index}", role=role, is_staff=role == User.Role.ADMIN)
+            for index in range(count)
+        ])
+        return {"client": client, "worker": worker, "service": service, "subscribers": subscribers}
+
+    def cleanup(self, prefix: str):
+        Order.objects.filter(client__username=f"{prefix}_client").delete()
+        User.objects.filter(username__startswith=prefix).delete()
+        Service.objects.filter(name=f"{prefix}_service").delete()
+
+    async def connect_all(self, application, subscribers, role) -> list:
+        headers = [(b"origin", b"http://localhost"), (b"host", b"localhost")]
+        communicators = []
+        for user in subscribers:
+            token = AccessToken.for_user(user)
+            communicator = WebsocketCommunicator(application, f"/ws/orders/{role}/?token={token}", headers=headers)
+            connected, _ = await communicator.connect(timeout=30)
+            if connected:
+                communicators.append(communicator)
+        return communicators
+
+    async def listen(self, communicator, received: list):
+        # receive_from() with a timeout cancels the application when it expires, so wait without one
+        while True:
+            frame = await communicator.receive_from(timeout=None)
+            content = ujson.loads(frame)
+            if content.get("order_id") is not None:
+                received.append((content["order_id"], content.get("status"), time.perf_counter()))
+
+    async def run(self, application, users: dict, options: dict) -> list:
+        subscribers = users["subscribers"]
+        role = options['role']
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        connect_started = time.perf_counter()
+        communicators = await self.connect_all(application, subscribers, role)
+        connect_time = time.perf_counter() - connect_started
+        memory_after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        received = []
+        listeners = [asyncio.create_task(self.listen(communicator, received)) for communicator in communicators]
+
+        sent_at = {}
+        expected = 0
+        for index in range(options['orders']):
+            worker = subscribers[index % len(subscribers)] if role == User.Role.WORKER else users["worker"]
+            started = time.perf_counter()
+            order = await sync_to_async(Order.objects.create)(
+                client=users["client"], worker=worker, service=users["service"], price=1000,
+            )
+            sent_at[(order.id, order.status)] = started
+            expected += 1 if role == User.Role.WORKER else len(communicators)
+
+            if options['transitions']:
+                for status in (Order.Status.IN_PROCESS, Order.Status.COMPLETED):
+                    order.status = status
+                    started = time.perf_counter()
+                    await sync_to_async(order.save)()
+                    sent_at[(order.id, status)] = started
+                    # status messages go to the client and admin_group only
+                    expected += len(communicators) if role == User.Role.ADMIN else 0
+
+        deadline = time.perf_counter() + options['timeout']
+        while len(received) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+        for communicator in communicators:
+            await communicator.disconnect()
+
+        latencies = [
+            (arrived - sent_at[(order_id, status)]) * 1000
+            for order_id, status, arrived in received if (order_id, status) in sent_at
+        ]
+        connected = len(communicators) or 1
+        return [
+            f"connections: {len(communicators)}/{len(subscribers)} ({role}), connect time {connect_time:.2f}s",
+            f"memory per connection: {(memory_after - memory_before) / connected / 1024:.1f} KiB",
+            f"events: {len(sent_at)}, expected frames: {expected}, delivered: {len(received)}, "
+            f"dropped: {max(expected - len(received), 0)}",
+            f"delivery latency p50: {percentile(latencies, 50):.2f} ms, p99: {percentile(latencies, 99):.2f} ms, "
+            f"max: {max(latencies, default=0):.2f} ms",
+        ]
@@ -1,12 +1,106 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, BrinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import transaction
 from django.db.models import CharField, Model, TextField, DecimalField, ForeignKey, CASCADE, SET_NULL, PROTECT, \
-    DateTimeField, BooleanField, OneToOneField
+    DO_NOTHING, DateField, DateTimeField, BooleanField, OneToOneField, JSONField, Index, Q, ManyToManyField, \
+    UniqueConstraint
 from django.db.models.enums import TextChoices
 from django.db.models.fields import IntegerField, BigIntegerField
 from django.db.models.functions import Now
+from django.dispatch import Signal
+from django.utils import timezone
 
+from apps.utils.search import search_enabled, order_search_vector
 
-class TimeBasedModel(Model):
+# sent after Order.transition() wins, with `instance`, `old_status`, the other written `fields`
+# and `old_values` {attname: value before the UPDATE}
+status_changed = Signal()
+# sent after Order.bulk_transition(), with the changed `orders` and their `old_statuses` {id: status}
+bulk_status_changed = Signal()
+
+
+class DirtyFieldsMixin:
+    """
+    Loaded field values snapshot.
+    Compares the current attribute values against the ones loaded from the database,
+    so signal handlers don't need an extra SELECT to find out what was changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not args and kwargs.get('update_fields') is None and not self._state.adding:
+            update_fields = self.get_update_fields()
+            if update_fields:
+                kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        # fields left out of update_fields keep their pending changes
+        self.snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # arefresh_from_db() runs this through sync_to_async
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.snapshot(fields)
+
+    def get_update_fields(self) -> list | None:
+        """
+        Changed fields plus auto_now ones, None when the instance wasn't loaded from the database.
+        """
+        if not hasattr(self, '_loaded_values'):
+            return None
+        loaded = self._loaded_values
+        deferred = self.get_deferred_fields()
+        changed = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+            and (field.attname not in loaded or loaded[field.attname] != getattr(self, field.attname))
+        ]
+        auto_now = [field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        return (changed + auto_now) or None
+
+    def snapshot(self, fields=None):
+        """
+        Marks the current values as the database ones, only of `fields` (names or attnames) when given.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is None:
+            self._loaded_values = {
+                field.attname: getattr(self, field.attname)
+                for field in self._meta.concrete_fields if field.attname not in deferred
+            }
+            return
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for name in fields:
+            attname = self._attname(name)
+            if attname not in deferred:
+                loaded[attname] = getattr(self, attname)
+
+    def _attname(self, name: str) -> str:
+        return self._meta.get_field(name).attname
+
+    @property
+    def changed_fields(self) -> list:
+        loaded = getattr(self, '_loaded_values', {})
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded and loaded[field.attname] != getattr(self, field.attname)
+        ]
+
+    def has_changed(self, name: str) -> bool:
+        loaded = getattr(self, '_loaded_values', {})
+        attname = self._attname(name)
+        return attname in loaded and loaded[attname] != getattr(self, attname)
+
+    def old_value(self, name: str):
+        return getattr(self, '_loaded_values', {}).get(self._attname(name))
+
+
+class TimeBasedModel(DirtyFieldsMixin, Model):
     updated_at = DateTimeField(verbose_name='Yangilangan sana', auto_now=True)
     created_at = DateTimeField(verbose_name='Yaratilgan sana', auto_now_add=True, db_default=Now())
 
@@ -14,7 +108,7 @@ class TimeBasedModel(Model):
         abstract = True
 
 
-class User(AbstractUser):
+class User(DirtyFieldsMixin, AbstractUser):
     class Role(TextChoices):
         CLIENT = 'client', 'Client'
         WORKER = 'worker', 'Worker'
@@ -23,6 +117,9 @@ class User(AbstractUser):
     role = CharField(max_length=10, choices=Role.choices, default=Role.CLIENT)
     phone = CharField(max_length=20, blank=True, null=True)
     specialty = CharField(max_length=100, blank=True, null=True)
+    specialties = ManyToManyField('apps.Service', related_name='specialists', blank=True,
+                                  verbose_name="Ishchi bajaradigan servislar")
+    last_seen = DateTimeField(verbose_name="Oxirgi marta onlayn", null=True, blank=True)
 
     def is_admin(self):
         return self.role == User.Role.ADMIN or self.is_staff
@@ -30,6 +127,12 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username}"
 
+    def get_service_ids(self):
+        """
+        Lazy, so it can be used as a subquery: service_id__in=user.get_service_ids()
+        """
+        return User.specialties.through.objects.filter(user_id=self.pk).values_list('service_id', flat=True)
+
 
 class Service(TimeBasedModel):
     name = CharField(max_length=200)
@@ -48,6 +151,15 @@ class Order(TimeBasedModel):
         COMPLETED = "completed", "Completed"
         CANCELED = "canceled", "Canceled"
 
+    # allowed status changes, completed and canceled orders are final
+    TRANSITIONS = {
+        Status.PENDING: (Status.PAID, Status.IN_PROCESS, Status.CANCELED),
+        Status.PAID: (Status.IN_PROCESS, Status.CANCELED),
+        Status.IN_PROCESS: (Status.COMPLETED, Status.CANCELED),
+        Status.COMPLETED: (),
+        Status.CANCELED: (),
+    }
+
     client = ForeignKey('apps.User', related_name="orders", on_delete=CASCADE,
                         limit_choices_to={"role": User.Role.CLIENT})
     worker = ForeignKey('apps.User', null=True, blank=True, related_name="assigned_orders",
@@ -56,22 +168,177 @@ class Order(TimeBasedModel):
     price = DecimalField(max_digits=10, decimal_places=2)
     status = CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     description = TextField(blank=True)
+    # service name (A) + description (B), written by save()/transition() with the row, by the signals on rename
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='order_search_vector_idx'),
+            # tiny, correlates with the append order and with the monthly partitions (partition_tables)
+            BrinIndex(fields=['created_at'], name='order_created_at_brin'),
+            Index(fields=['service', '-created_at']),
+            Index(fields=['-created_at', '-id']),
+            Index(fields=['client', '-created_at', '-id']),
+            Index(fields=['worker', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Order {self.client.username}"
 
+    @property
+    def is_available(self) -> bool:
+        """
+        Order can still be taken by a worker.
+        """
+        return self.worker_id is None and self.status in (Order.Status.PENDING, Order.Status.PAID)
+
+    def can_transition(self, status) -> bool:
+        return status in self.TRANSITIONS.get(self.status, ())
+
+    def transition(self, status, **fields) -> bool:
+        """
+        Compare-and-set status change: UPDATE ... WHERE id = <id> AND status = <current status>.
+        Returns False when the row's status was changed by someone else meanwhile.
+        """
+        if not self.can_transition(status):
+            raise ValueError(f"{self.status} -> {status} is not allowed")
+        old_status = self.status
+        values = {'status': status, 'updated_at': timezone.now(), **fields}
+        old_values = {self._attname(name): getattr(self, self._attname(name)) for name in values}
+        update = dict(values)
+        if 'description' in fields and search_enabled():
+            update['search_vector'] = order_search_vector(self.service.name, fields['description'])
+        with transaction.atomic():
+            if not Order.objects.filter(pk=self.pk, status=old_status).update(**update):
+                return False
+            for name, value in values.items():
+                setattr(self, name, value)
+            self.snapshot(values)
+            status_changed.send(sender=Order, instance=self, old_status=old_status, fields=tuple(fields),
+                                old_values=old_values)
+        return True
+
+    @classmethod
+    def bulk_transition(cls, queryset, status) -> tuple[list, list]:
+        """
+        Locks the orders of the queryset and moves the ones that allow it to `status` with one UPDATE.
+        Returns (changed orders, orders whose current status doesn't allow the transition).
+        """
+        with transaction.atomic():
+            orders = list(queryset.select_related(None).select_for_update()
+                          .only('id', 'status', 'client', 'worker', 'service', 'price', 'created_at'))
+            changed = [order for order in orders if order.can_transition(status)]
+            conflicts = [order for order in orders if not order.can_transition(status)]
+            if changed:
+                now = timezone.now()
+                cls.objects.filter(pk__in=[order.pk for order in changed]).update(status=status, updated_at=now)
+                old_statuses = {order.pk: order.status for order in changed}
+                for order in changed:
+                    order.status, order.updated_at = status, now
+                    order.snapshot(('status', 'updated_at'))
+                bulk_status_changed.send(sender=cls, orders=changed, old_statuses=old_statuses)
+        return changed, conflicts
+
+    def search_vector_outdated(self, update_fields=None) -> bool:
+        if not search_enabled():
+            return False
+        if self._state.adding:
+            return True
+        names = {'description', 'service'}
+        if update_fields is not None:
+            names &= {self._meta.get_field(name).name for name in update_fields}
+        return any(self.has_changed(name) for name in names)
+
+    def save(self, *args, **kwargs):
+        # the search vector goes into the same INSERT/UPDATE, not into a second UPDATE after it
+        update_fields = kwargs.get('update_fields')
+        if self.search_vector_outdated(update_fields):
+            self.search_vector = order_search_vector(self.service.name, self.description)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_vector'}
+        # post_save handlers (notifications, outbox) must be committed together with the order row
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        # the expression was evaluated by the database, the value is loaded on access
+        self.__dict__.pop('search_vector', None)
+        getattr(self, '_loaded_values', {}).pop('search_vector', None)
+
 
 class Notification(Model):
     sender = ForeignKey('apps.User', on_delete=CASCADE, related_name='sent_notifications', null=True, blank=True)
     receiver = ForeignKey('apps.User', on_delete=CASCADE, related_name='received_notifications')
+    # order and its status at the time of the event, replayed frames carry them like the live ones
+    order = ForeignKey('apps.Order', on_delete=SET_NULL, related_name='notifications', null=True, blank=True)
+    status = CharField(max_length=20, choices=Order.Status.choices, null=True, blank=True)
     message = TextField()
     is_read = BooleanField(default=False)
     created_at = DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            BrinIndex(fields=['created_at'], name='notification_created_at_brin'),
+            Index(fields=['receiver', '-created_at', '-id']),
+            Index(fields=['-created_at', '-id']),
+            Index(fields=['receiver'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
+
     def __str__(self):
         return f"From {self.sender} to {self.receiver}: {self.message[:30]}"
 
 
+class WorkerFeedEntry(Model):
+    """
+    Materialized "available orders" feed, one row per (worker, order) the worker can take.
+    """
+    worker = ForeignKey('apps.User', CASCADE, related_name='feed_entries')
+    order = ForeignKey('apps.Order', CASCADE, related_name='feed_entries')
+    created_at = DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['worker', 'order'], name='worker_feed_unique_order'),
+        ]
+        indexes = [
+            Index(fields=['worker', '-created_at', '-order']),
+        ]
+
+    def __str__(self):
+        return f"Feed {self.worker_id} -> {self.order_id}"
+
+
+class OutboxMessage(Model):
+    group = CharField(max_length=255)
+    payload = JSONField()
+    created_at = DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Outbox {self.pk} -> {self.group}"
+
+
+class OrderStat(Model):
+    """
+    Orders rollup per (day, service, worker, status), maintained incrementally by the order signals.
+    Rebuild with `manage.py rebuild_order_stats`.
+    """
+    day = DateField()
+    service = ForeignKey('apps.Service', CASCADE, related_name='order_stats')
+    # no FK constraint: rows of a deleted worker stay as history
+    worker = ForeignKey('apps.User', DO_NOTHING, null=True, blank=True, related_name='order_stats',
+                        db_constraint=False)
+    status = CharField(max_length=20, choices=Order.Status.choices)
+    count = IntegerField(default=0)
+    total = DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['day', 'service', 'worker', 'status'], nulls_distinct=False,
+                             name='order_stat_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.service_id} {self.worker_id} {self.status}: {self.count}"
+
+
 class Transaction(TimeBasedModel):
     class Status(TextChoices):
         WAITING = 'waiting', "Kutilmoqda"
@@ -102,12 +369,13 @@ class Transaction(TimeBasedModel):
         return f"transaction id {self.pk}"
 
     def change_status(self, status):
-        order = self.order
-        if self.status == Transaction.Status.CONFIRMED:
-            order.status = self.order.Status.PAID
-            order.save()
-        elif self.status == Transaction.Status.CANCELED:
-            order.status = self.order.Status.CANCELED
-            order.save()
-        self.status = status
-        self.save()
+        order_status = {
+            Transaction.Status.CONFIRMED: Order.Status.PAID,
+            Transaction.Status.CANCELED: Order.Status.CANCELED,
+        }.get(status)
+        with transaction.atomic():
+            if order_status and self.order.can_transition(order_status):
+                # a lost race means the order was already moved on, the payment is recorded anyway
+                self.order.transition(order_status)
+            self.status = status
+            self.save()
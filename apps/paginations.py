@@ -0,0 +1,163 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination.
+    The cursor keeps the ordering values of the last row of the page, so the next page is
+    an index range scan `WHERE (created_at, id) < (...)` instead of an OFFSET over the whole table.
+    A view can change the ordering with the `keyset_ordering` attribute.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = "Noto'g'ri cursor"
+
+    def get_ordering(self, view) -> tuple:
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def clean_position(self, queryset, position) -> list:
+        """
+        Cursor values converted with to_python of the ordering fields (model fields or annotations),
+        a cursor holding values of the wrong types is invalid.
+        """
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            else:
+                model_field = queryset.model._meta.get_field(name)
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    def encode_cursor(self, position) -> str:
+        return base64.urlsafe_b64encode(json.dumps(position, default=str).encode()).decode()
+
+    def get_position(self, row) -> list:
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def position_filter(self, position) -> Q:
+        """
+        (a, b) < (x, y)  ->  a <= x AND (a < x OR (a = x AND b < y))
+        The leading `a <= x` keeps the condition usable as an index range.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        first = self.ordering[0]
+        first_lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{first_lookup}': position[0]}) & condition
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        The queryset of the requested page plus one row, to know whether there is a next page.
+        """
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.limit = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(self.clean_position(queryset, position)))
+        return queryset[:self.limit + 1]
+
+    def finish_page(self, rows: list) -> list:
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish_page([row async for row in self.page_queryset(queryset, request, view)])
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyingi sahifa uchun cursor',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Sahifadagi elementlar soni",
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,3 +1,7 @@
-from apps.serializers.order_service_serilaizers import ServiceSerializer, OrderCreateSerializer, OrderSerializer
+from apps.serializers.order_service_serilaizers import ServiceSerializer, OrderCreateSerializer, OrderSerializer, \
+    BulkTransitionSerializer, OrderStatsQuerySerializer, OrderStatsSerializer
 from apps.serializers.payment_serializers import ClickSerializer, ClickTransactionSerializer, \
     TransactionListModelSerializer, MerchantTransactionsSerializer, TransactionDetailModelSerializer
+from apps.serializers.export_serializers import ExportQuerySerializer
+from apps.serializers.flat_serializers import OrderFlatSerializer, NotificationFlatSerializer, \
+    TransactionListFlatSerializer
@@ -0,0 +1,16 @@
+from rest_framework.serializers import Serializer, DateField, ChoiceField
+
+
+class ExportQuerySerializer(Serializer):
+    """
+    `status` choices are set by the view from the exported model.
+    """
+    date_from = DateField(required=False, help_text="Shu kundan boshlab (created_at)")
+    date_to = DateField(required=False, help_text="Shu kun oxirigacha (created_at)")
+    status = ChoiceField(choices=[], required=False)
+    # `format` is taken by DRF for the renderer suffix
+    output = ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+    def __init__(self, *args, status_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['status'].choices = status_choices
@@ -0,0 +1,126 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.fields import empty, IntegerField, CharField, BooleanField
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer
+
+from apps.serializers.order_service_serilaizers import OrderSerializer
+from apps.serializers.payment_serializers import TransactionListModelSerializer
+from apps.serializers.user_serializers import NotificationSerializer
+
+# to_representation of these returns the database value unchanged
+PASSTHROUGH_FIELDS = IntegerField, CharField, BooleanField, PrimaryKeyRelatedField
+# marks a field DRF leaves out of the output
+SKIP = object()
+
+
+class FlatSerializer:
+    """
+    Builds the output of `serializer_class` from QuerySet.values() rows, without model instances.
+    The plan (values() lookup + the DRF field's to_representation per output key) is compiled once
+    per serializer arguments, so the output and the OpenAPI schema stay the ones of `serializer_class`.
+    `extra` adds {output key: lookup} pairs written by a custom to_representation.
+    """
+    serializer_class = None
+    extra = {}
+    _plans = {}
+    # output keys of serializer_class, per FlatSerializer class
+    _field_names = {}
+
+    def __init__(self, fields=None, **kwargs):
+        """
+        `fields` (the requested ?fields=) is reduced to known field names, so there is at most one plan per
+        real field combination. The other kwargs come from code and must be hashable.
+        """
+        cls = type(self)
+        if cls not in self._field_names:
+            self._field_names[cls] = frozenset(self.serializer_class().fields)
+        if fields is not None:
+            kwargs['fields'] = frozenset(fields) & self._field_names[cls] or None
+        key = (cls, tuple(sorted(kwargs.items())))
+        if key not in self._plans:
+            self._plans[key] = self.compile(self.serializer_class(**kwargs))
+        self.plan = self._plans[key]
+        self.lookups = list(dict.fromkeys([*self.collect_lookups(self.plan), *self.extra.values()]))
+
+    def compile(self, serializer, prefix: str = '') -> list:
+        """
+        [(name, lookup, to_representation or None, null_lookups, missing, nested plan or None)]
+        """
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or not field.source_attrs:
+                raise ImproperlyConfigured(f"{type(serializer).__name__}.{name} can't be read from values()")
+            lookup = prefix + '__'.join(field.source_attrs)
+            # relations traversed by a dotted source, DRF leaves the key out (or uses default/None) on a null one
+            null_lookups = [
+                prefix + '__'.join(field.source_attrs[:depth]) for depth in range(1, len(field.source_attrs))
+            ]
+            if field.default is not empty:
+                missing = field.get_default()
+            elif field.allow_null:
+                missing = None
+            else:
+                missing = SKIP
+            if isinstance(field, BaseSerializer):
+                nested = self.compile(field, f"{lookup}__")
+                plan.append((name, lookup, None, null_lookups, missing, nested))
+            else:
+                convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+                plan.append((name, lookup, convert, null_lookups, missing, None))
+        return plan
+
+    def collect_lookups(self, plan):
+        for name, lookup, convert, null_lookups, missing, nested in plan:
+            yield from null_lookups
+            if nested is None:
+                yield lookup
+            else:
+                # a null relation serializes as None
+                yield f"{lookup}__pk"
+                yield from self.collect_lookups(nested)
+
+    def values(self, queryset, *extra_lookups):
+        """
+        `extra_lookups` - columns the caller needs too (pagination ordering).
+        """
+        return queryset.values(*dict.fromkeys([*self.lookups, *extra_lookups]))
+
+    def build(self, row: dict, plan: list) -> dict:
+        data = {}
+        for name, lookup, convert, null_lookups, missing, nested in plan:
+            if null_lookups and any(row[null_lookup] is None for null_lookup in null_lookups):
+                if missing is not SKIP:
+                    data[name] = missing
+                continue
+            if nested is not None:
+                data[name] = None if row[f"{lookup}__pk"] is None else self.build(row, nested)
+                continue
+            value = row[lookup]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def to_representation(self, rows) -> list:
+        plan = self.plan
+        extra = self.extra.items()
+        data = []
+        for row in rows:
+            item = self.build(row, plan)
+            for name, lookup in extra:
+                item[name] = row[lookup]
+            data.append(item)
+        return data
+
+
+class OrderFlatSerializer(FlatSerializer):
+    serializer_class = OrderSerializer
+
+
+class NotificationFlatSerializer(FlatSerializer):
+    serializer_class = NotificationSerializer
+
+
+class TransactionListFlatSerializer(FlatSerializer):
+    serializer_class = TransactionListModelSerializer
+    extra = {'order_id': 'order'}
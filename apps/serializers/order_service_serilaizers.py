@@ -1,10 +1,12 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.serializers import ModelSerializer
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.fields import ListField, IntegerField, ChoiceField, DateField, MultipleChoiceField
+from rest_framework.serializers import ModelSerializer, Serializer, CharField, DecimalField
 
 from apps.models import Service, Order
+from apps.utils.outbox import enqueue
 
 User = get_user_model()
 
@@ -24,31 +26,69 @@ class OrderCreateSerializer(ModelSerializer):
         user = self.context['request'].user
         service = validated_data['service']
         price = service.base_price
-        order = Order.objects.create(client_id=user.pk, service_id=service.pk, price=price, **validated_data)
-
-        # Send WS notification
-        layer = get_channel_layer()
-        async_to_sync(layer.group_send)(
-            f"service_{service.id}",
-            {
-                "type": "order.created",
-                "order_id": order.id,
-                "service_id": service.id,
-                "price": str(order.price),
-            }
-        )
+        with transaction.atomic():
+            order = Order.objects.create(client_id=user.pk, service_id=service.pk, price=price, **validated_data)
+
+            # Send WS notification
+            enqueue(
+                f"service_{service.id}",
+                {
+                    "type": "order.created",
+                    "event": "order.created",
+                    "order_id": order.id,
+                    "service_id": service.id,
+                    "price": str(order.price),
+                }
+            )
         return order
 
 
 class OrderSerializer(ModelSerializer):
+    """
+    `fields` - sparse fieldset, only these fields are serialized.
+    `nested_service=False` - service is returned as id instead of the nested object.
+    """
     service = ServiceSerializer(read_only=True)
 
     class Meta:
         model = Order
-        fields = "__all__"
+        exclude = "search_vector",
+
+    def __init__(self, *args, fields=None, nested_service=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not nested_service:
+            self.fields['service'] = PrimaryKeyRelatedField(read_only=True)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     # def update(self, instance, validated_data):
     #     request = self.context["request"]
     #     if "status" in validated_data and request.user == instance.client:
     #         raise PermissionDenied("Mijoz buyurtma holatini o'zgartiraolmaydi!")
     #     return super().update(instance, validated_data)
+
+
+class BulkTransitionSerializer(Serializer):
+    ids = ListField(child=IntegerField(min_value=1), allow_empty=False, max_length=500,
+                    help_text="Holati o'zgartiriladigan buyurtmalar id lari")
+    status = ChoiceField(choices=Order.Status.choices)
+
+
+class OrderStatsQuerySerializer(Serializer):
+    date_from = DateField(required=False)
+    date_to = DateField(required=False)
+    service = IntegerField(required=False)
+    worker = IntegerField(required=False)
+    status = ChoiceField(choices=Order.Status.choices, required=False)
+    group_by = MultipleChoiceField(choices=['day', 'service', 'worker', 'status'], required=False,
+                                   help_text="Guruhlash maydonlari, masalan ?group_by=day&group_by=status")
+
+
+class OrderStatsSerializer(Serializer):
+    day = DateField(required=False)
+    service = IntegerField(required=False)
+    worker = IntegerField(required=False)
+    status = CharField(required=False)
+    count = IntegerField()
+    total = DecimalField(max_digits=16, decimal_places=2)
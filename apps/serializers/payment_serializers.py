@@ -49,7 +49,7 @@ class TransactionListModelSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        rep['order_id'] = instance.order.app_id
+        rep['order_id'] = instance.order_id
         return rep
 
 
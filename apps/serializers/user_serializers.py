@@ -1,19 +1,32 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import CharField, ChoiceField
+from rest_framework.fields import CharField, ChoiceField, IntegerField
 from rest_framework.serializers import ModelSerializer, Serializer
 
-from apps.models import Notification
+from apps.models import Notification, Service
 
 User = get_user_model()
 
 
+def resolve_specialties(attrs: dict) -> dict:
+    """
+    A free-text `specialty` without `specialties` is mapped to the services it used to match by name.
+    """
+    if not attrs.get("specialties") and attrs.get("specialty"):
+        attrs["specialties"] = list(Service.objects.filter(name__icontains=attrs["specialty"]))
+    return attrs
+
+
 class UserSerializer(ModelSerializer):
     class Meta:
         model = User
-        fields = "id", "username", "email", "role", "phone", "specialty", "is_active", "date_joined"
-        read_only_fields = "id", "role", "is_active", "date_joined"
+        fields = ("id", "username", "email", "role", "phone", "specialty", "specialties", "is_active", "date_joined",
+                  "last_seen")
+        read_only_fields = "id", "role", "is_active", "date_joined", "last_seen"
+
+    def validate(self, attrs):
+        return resolve_specialties(super().validate(attrs))
 
 
 class RegisterSerializer(ModelSerializer):
@@ -22,16 +35,25 @@ class RegisterSerializer(ModelSerializer):
 
     class Meta:
         model = User
-        fields = ("username", "email", "password", "role", "phone", "specialty")
+        fields = ("username", "email", "password", "role", "phone", "specialty", "specialties")
+
+    def validate(self, attrs):
+        attrs = resolve_specialties(super().validate(attrs))
+        if attrs.get("role") == User.Role.WORKER and not attrs.get("specialties"):
+            raise ValidationError({"specialties": "Usta uchun kamida bitta servis tanlanishi kerak"})
+        return attrs
 
     def create(self, validated_data):
         role = validated_data.pop("role", "client")
+        specialties = validated_data.pop("specialties", [])
         user = User(**validated_data)
         user.set_password(validated_data["password"])
         user.role = role
         if user.role == User.Role.ADMIN:
             user.is_staff = True
         user.save()
+        if specialties:
+            user.specialties.set(specialties)
         return user
 
 
@@ -61,3 +83,7 @@ class NotificationSerializer(ModelSerializer):
             "message", "is_read", "created_at"
         ]
         read_only_fields = "id", "sender", "is_read", "created_at"
+
+
+class MarkReadSerializer(Serializer):
+    up_to = IntegerField(min_value=1, help_text="Shu id gacha bo'lgan xabarlar o'qilgan deb belgilanadi")
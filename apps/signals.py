@@ -1,71 +1,180 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from django.db.models.signals import post_save, pre_save
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
-from apps.models import Order, Notification
+from apps.models import Order, Notification, User, Service, status_changed, bulk_status_changed
+from apps.utils import order_stats
+from apps.utils.catalog import bump_catalog_version
+from apps.utils.outbox import enqueue_many
+from apps.utils.search import update_search_vector
+from apps.utils.unread import incr_unread, incr_unread_many
+from apps.utils.user_cache import user_cache, bump_user_version
+from apps.utils.user_stats import invalidate_user_stats
+from apps.utils.worker_feed import sync_order, rebuild_worker, remove_orders
+
+
+STATUS_MESSAGES = {
+    Order.Status.IN_PROCESS: "Sizning buyurtmangiz qabul qilindi: {id}",
+    Order.Status.COMPLETED: "Sizning buyurtmangiz ({id}) yakunlandi ✅.",
+    Order.Status.CANCELED: "Sizning buyurtmangiz ({id}) bekor qilindi ❌.",
+}
+
 
-_old_status = {}
+def notification_events(notification, order) -> list:
+    event = {
+        "type": "send_message",
+        "id": notification.id,
+        "order_id": order.id,
+        "status": order.status,
+        "message": notification.message,
+    }
+    return [
+        (f"user_{notification.receiver_id}", event),
+        ("admin_group", {**event, "message": f"[ADMIN LOG] {notification.message}"}),
+    ]
 
 
-@receiver(pre_save, sender=Order)
-def cache_old_status(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = Order.objects.get(pk=instance.pk)
-            _old_status[instance.pk] = old.status
-        except Order.DoesNotExist:
-            _old_status[instance.pk] = None
+def coalesced_event(items, message) -> dict:
+    """
+    One event for several (notification, order) pairs.
+    """
+    notifications = [notification for notification, _ in items]
+    return {
+        "type": "send_message",
+        # the newest id, so the client resumes the replay after the whole batch
+        "id": max(notification.id for notification in notifications),
+        "ids": [notification.id for notification in notifications],
+        "order_ids": [order.id for _, order in items],
+        "status": items[0][1].status,
+        "message": message,
+    }
+
+
+def notify_status_changed(order) -> None:
+    message = STATUS_MESSAGES.get(order.status)
+    if message:
+        notification = Notification.objects.create(sender_id=order.worker_id, receiver_id=order.client_id,
+                                                   order=order, status=order.status,
+                                                   message=message.format(id=order.id))
+        enqueue_many(notification_events(notification, order))
 
 
 @receiver(post_save, sender=Order)
 def order_created_or_updated(sender, instance, created, **kwargs):
-    worker = instance.worker
-    client = instance.client
-    channel_layer = get_channel_layer()
-    if channel_layer is None:
-        print("Error: Channel layer is None")
+    worker_id = instance.worker_id
+    client_id = instance.client_id
+    sync_order(instance, created)
+    if created:
+        order_stats.order_created(instance)
     else:
-        print(f"Channel layer: {channel_layer}")
+        order_stats.order_saved(instance)
 
     if created:
+        if not worker_id:
+            return
         message = f"Yangi buyurtma: {instance.id}"
-        Notification.objects.create(sender_id=client.id, receiver_id=worker.id, message=message)
+        notification = Notification.objects.create(sender_id=client_id, receiver_id=worker_id, order=instance,
+                                                   status=instance.status, message=message)
+        enqueue_many(notification_events(notification, instance))
 
-        async_to_sync(channel_layer.group_send)(
-            f"user_{worker.id}",
-            {"type": "send_message", "message": message}
-        )
+    elif instance.has_changed('status'):
+        notify_status_changed(instance)
 
-        async_to_sync(channel_layer.group_send)(
-            "admin_group",
-            {"type": "send_message", "message": f"[ADMIN LOG] {message}"}
-        )
 
-    else:
-        old_status = _old_status.get(instance.pk)
-        new_status = instance.status
-        msg = None
-
-        if old_status != new_status:
-            if new_status == "in_process":
-                msg = f"Sizning buyurtmangiz qabul qilindi: {instance.id}"
-            elif new_status == "completed":
-                msg = f"Sizning buyurtmangiz ({instance.id}) yakunlandi ✅."
-            elif new_status == "canceled":
-                msg = f"Sizning buyurtmangiz ({instance.id}) bekor qilindi ❌."
-
-            if msg:
-                Notification.objects.create(sender_id=worker.id, receiver_id=client.id, message=msg)
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{client.id}",
-                    {"type": "send_message", "message": msg}
-                )
-
-                async_to_sync(channel_layer.group_send)(
-                    "admin_group",
-                    {"type": "send_message", "message": f"[ADMIN LOG] {msg}"}
-                )
-
-        if instance.pk in _old_status:
-            del _old_status[instance.pk]
+@receiver(status_changed, sender=Order)
+def order_status_changed(sender, instance, old_status, fields=(), old_values=None, **kwargs):
+    old_values = old_values or {'status': old_status}
+    order_stats.order_changed(instance, old_values)
+    sync_order(instance, old_values=old_values)
+    notify_status_changed(instance)
+
+
+@receiver(bulk_status_changed, sender=Order)
+def orders_status_changed(sender, orders, old_statuses, **kwargs):
+    """
+    One bulk INSERT of notifications and one coalesced event per receiver.
+    """
+    order_stats.orders_status_changed(orders, old_statuses)
+    remove_orders([order.id for order in orders if not order.is_available])
+    notified = [order for order in orders if order.status in STATUS_MESSAGES]
+    notifications = Notification.objects.bulk_create([
+        Notification(sender_id=order.worker_id, receiver_id=order.client_id, order=order, status=order.status,
+                     message=STATUS_MESSAGES[order.status].format(id=order.id))
+        for order in notified
+    ])
+    if not notifications:
+        return
+
+    by_receiver = defaultdict(list)
+    for notification, order in zip(notifications, notified):
+        by_receiver[notification.receiver_id].append((notification, order))
+    events = []
+    for receiver_id, items in by_receiver.items():
+        if len(items) == 1:
+            events.append(notification_events(*items[0])[0])
+        else:
+            message = f"{len(items)} ta buyurtmangiz holati o'zgardi: {items[0][1].status}"
+            events.append((f"user_{receiver_id}", coalesced_event(items, message)))
+    message = f"[ADMIN LOG] {len(notified)} ta buyurtma holati o'zgardi: {notified[0].status}"
+    events.append(("admin_group", coalesced_event(list(zip(notifications, notified)), message)))
+    enqueue_many(events)
+
+    unread = Counter(notification.receiver_id for notification in notifications)
+    transaction.on_commit(lambda: incr_unread_many(unread))
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    order_stats.order_deleted(instance)
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: incr_unread(instance.receiver_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+    # other processes must not reload the row before it's committed
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+@receiver(post_save, sender=User)
+def user_role_changed(sender, instance, created, **kwargs):
+    if created or instance.has_changed('role'):
+        transaction.on_commit(invalidate_user_stats)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_user_stats)
+
+
+@receiver(m2m_changed, sender=User.specialties.through)
+def worker_specialties_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    worker_ids = (pk_set or ()) if reverse else [instance.pk]
+    if reverse and action == 'post_clear':
+        # service.specialists.clear() doesn't report the removed workers
+        worker_ids = User.objects.filter(feed_entries__order__service=instance).values_list('id', flat=True).distinct()
+    for worker_id in list(worker_ids):
+        rebuild_worker(worker_id)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_catalog_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Service)
+def service_renamed(sender, instance, created, **kwargs):
+    if not created and instance.has_changed('name'):
+        update_search_vector(Order.objects.filter(service=instance), instance.name)
@@ -0,0 +1,36 @@
+from django.test import TestCase, override_settings
+
+from apps.models import User, Service, Order
+
+TEST_SETTINGS = {
+    'CHANNEL_LAYERS': {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    'CACHES': {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    'OUTBOX': {'BATCH_SIZE': 100, 'DISPATCH_IN_THREAD': False},
+}
+
+
+@override_settings(**TEST_SETTINGS)
+class BaseTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', role=User.Role.ADMIN)
+        cls.client_user = User.objects.create(username='client', role=User.Role.CLIENT)
+        cls.worker = User.objects.create(username='worker', role=User.Role.WORKER)
+        cls.service = Service.objects.create(name='Santexnika', base_price=100)
+
+    def create_order(self, **kwargs):
+        return Order.objects.create(**{'client': self.client_user, 'service': self.service, 'price': 100, **kwargs})
+
+
+def websocket(user, role: str, query: str = '', subprotocols=None):
+    """
+    WebsocketCommunicator for OrderConsumer with the user already authenticated.
+    """
+    from channels.testing import WebsocketCommunicator
+
+    from apps.consumers import OrderConsumer
+
+    communicator = WebsocketCommunicator(OrderConsumer.as_asgi(), f"/ws/orders/{role}/?{query}", subprotocols=subprotocols)
+    communicator.scope['user'] = user
+    communicator.scope['url_route'] = {'args': (), 'kwargs': {'role': role}}
+    return communicator
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.models import Service
+from apps.tests.base import BaseTestCase
+from apps.utils.catalog import service_catalog
+from apps.utils.user_cache import user_cache
+
+
+class ServiceCatalogTests(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        service_catalog._local = None
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.client_user)}")
+
+    def test_not_modified(self):
+        response = self.api.get(reverse('services-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([service['name'] for service in response.data], ['Santexnika'])
+
+        # user va katalog keshdan, bazaga so'rov yo'q
+        with self.assertNumQueries(0):
+            not_modified = self.api.get(reverse('services-list'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+        since = self.api.get(reverse('services-list'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_changed_catalog(self):
+        etag = self.api.get(reverse('services-list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name='Elektrik', base_price=200)
+
+        response = self.api.get(reverse('services-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(sorted(service['name'] for service in response.data), ['Elektrik', 'Santexnika'])
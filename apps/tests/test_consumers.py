@@ -0,0 +1,118 @@
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+import msgpack
+from channels.layers import get_channel_layer
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.base import CustomAsyncJsonWebsocketConsumer, ws_stats
+from apps.models import Notification
+from apps.tests.base import BaseTestCase, websocket
+from apps.utils.codecs import attach_frames
+
+
+class ReplayTests(BaseTestCase):
+    async def receive_all(self, communicator) -> list:
+        frames = []
+        while not await communicator.receive_nothing(timeout=0.1):
+            frames.append(await communicator.receive_json_from())
+        return frames
+
+    async def replay(self, since) -> list:
+        communicator = websocket(self.client_user, 'client', f'since={since}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        frames = await self.receive_all(communicator)
+        await communicator.disconnect()
+        return frames
+
+    async def test_replays_missed_notifications(self):
+        seen = await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message='seen')
+        await Notification.objects.filter(id=seen.id).aupdate(created_at=timezone.now() - timedelta(minutes=5))
+        missed = await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message='missed')
+        await Notification.objects.acreate(sender=self.worker, receiver=self.admin, message='other')
+
+        frames = await self.replay(seen.id)
+        self.assertEqual([frame['id'] for frame in frames], [missed.id])
+        self.assertEqual(frames[0]['message'], 'missed')
+
+    async def test_replays_rows_committed_after_since(self):
+        # late kichik id li, lekin seen dan keyin commit bo'lgan xabar
+        late = await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message='late')
+        seen = await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message='seen')
+
+        frames = await self.replay(seen.id)
+        self.assertIn(late.id, [frame['id'] for frame in frames])
+
+    async def test_truncated_replay(self):
+        since = await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message='seen')
+        await Notification.objects.filter(id=since.id).aupdate(created_at=timezone.now() - timedelta(minutes=5))
+        for index in range(3):
+            await Notification.objects.acreate(sender=self.worker, receiver=self.client_user, message=str(index))
+
+        with mock.patch('apps.consumers.REPLAY_LIMIT', 2):
+            frames = await self.replay(since.id)
+        self.assertEqual([frame.get('message') for frame in frames[:2]], ['0', '1'])
+        self.assertEqual(frames[2], {'type': 'replay_truncated', 'last_id': frames[1]['id']})
+
+
+class BackpressureTests(BaseTestCase):
+    async def test_messages_over_the_rate_limit_are_dropped(self):
+        dropped = ws_stats['dropped_messages']
+        communicator = websocket(self.worker, 'worker')
+        with override_settings(WS_RATE_LIMIT={'RATE': 0.001, 'BURST': 2}):
+            await communicator.connect()
+        for _ in range(5):
+            await communicator.send_json_to({'action': 'subscribe', 'services': [self.service.id]})
+        replies = []
+        while not await communicator.receive_nothing(timeout=0.1):
+            replies.append(await communicator.receive_json_from())
+        await communicator.disconnect()
+
+        self.assertEqual(replies, [{'services': [self.service.id]}] * 2)
+        self.assertEqual(ws_stats['dropped_messages'] - dropped, 3)
+
+    async def test_slow_consumer_is_closed(self):
+        async def stalled_writer(consumer):
+            # mijoz o'qimayapti: navbatdagi freymlar yuborilmaydi
+            await asyncio.Event().wait()
+
+        communicator = websocket(self.client_user, 'client')
+        with override_settings(WS_RATE_LIMIT={'MAX_SEND_QUEUE': 1}), \
+                mock.patch.object(CustomAsyncJsonWebsocketConsumer, 'write_frames', stalled_writer):
+            await communicator.connect()
+            layer = get_channel_layer()
+            for index in range(2):
+                await layer.group_send(f"user_{self.client_user.id}", {'type': 'send_message', 'message': str(index)})
+            output = await communicator.receive_output()
+            await communicator.disconnect()
+        self.assertEqual(output, {'type': 'websocket.close', 'code': 4008})
+
+
+class CodecTests(BaseTestCase):
+    async def test_msgpack_subprotocol(self):
+        communicator = websocket(self.worker, 'worker', subprotocols=['msgpack'])
+        connected, subprotocol = await communicator.connect()
+        self.assertEqual(subprotocol, 'msgpack')
+
+        await communicator.send_to(bytes_data=msgpack.packb({'action': 'subscribe', 'services': [self.service.id]}))
+        self.assertEqual(msgpack.unpackb(await communicator.receive_from()), {'services': [self.service.id]})
+
+        await get_channel_layer().group_send(
+            f"user_{self.worker.id}", attach_frames({'type': 'send_message', 'id': 1, 'message': 'salom'})
+        )
+        self.assertEqual(msgpack.unpackb(await communicator.receive_from()), {'id': 1, 'message': 'salom'})
+        await communicator.disconnect()
+
+    async def test_json_without_subprotocol(self):
+        communicator = websocket(self.worker, 'worker')
+        connected, subprotocol = await communicator.connect()
+        self.assertIsNone(subprotocol)
+
+        await get_channel_layer().group_send(
+            f"user_{self.worker.id}", attach_frames({'type': 'send_message', 'id': 1, 'message': 'salom'})
+        )
+        self.assertEqual(await communicator.receive_json_from(), {'id': 1, 'message': 'salom'})
+        await communicator.disconnect()
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+from apps.models import Order, OrderStat
+from apps.tests.base import BaseTestCase
+from apps.utils import order_stats
+
+
+class OrderStatTests(BaseTestCase):
+    def stats(self) -> dict:
+        return {
+            (stat.service_id, stat.worker_id, stat.status): (stat.count, stat.total)
+            for stat in OrderStat.objects.filter(count__gt=0)
+        }
+
+    def test_deltas_follow_order_writes(self):
+        order = self.create_order()
+        self.assertEqual(self.stats(), {(self.service.id, None, Order.Status.PENDING): (1, Decimal(100))})
+
+        order.price = 150
+        order.save()
+        order.transition(Order.Status.IN_PROCESS, worker=self.worker)
+        self.assertEqual(self.stats(), {(self.service.id, self.worker.id, Order.Status.IN_PROCESS): (1, Decimal(150))})
+
+        Order.bulk_transition(Order.objects.filter(pk=order.pk), Order.Status.COMPLETED)
+        self.assertEqual(self.stats(), {(self.service.id, self.worker.id, Order.Status.COMPLETED): (1, Decimal(150))})
+
+        order.refresh_from_db()
+        order.delete()
+        self.assertEqual(self.stats(), {})
+
+    def test_incremental_rollup_matches_rebuild(self):
+        orders = [self.create_order(price=100 + index) for index in range(4)]
+        orders[0].transition(Order.Status.PAID)
+        orders[1].transition(Order.Status.CANCELED)
+        orders[2].worker = self.worker
+        orders[2].save()
+        Order.bulk_transition(Order.objects.filter(pk__in=[orders[2].pk, orders[3].pk]), Order.Status.IN_PROCESS)
+        orders[3].refresh_from_db()
+        orders[3].delete()
+
+        incremental = self.stats()
+        order_stats.rebuild()
+        self.assertEqual(incremental, self.stats())
+        self.assertEqual(set(OrderStat.objects.values_list('day', flat=True)), {timezone.localdate()})
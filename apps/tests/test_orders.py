@@ -0,0 +1,146 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.models import Order, Notification, OrderStat, OutboxMessage
+from apps.tests.base import BaseTestCase
+
+
+class OrderTransitionTests(BaseTestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_transition_is_compare_and_set(self):
+        order = self.create_order()
+        stale = Order.objects.get(pk=order.pk)
+        self.assertTrue(order.transition(Order.Status.PAID))
+
+        self.assertFalse(stale.transition(Order.Status.CANCELED))
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Order.Status.PAID)
+
+    def test_forbidden_transition_returns_400(self):
+        order = self.create_order(status=Order.Status.COMPLETED)
+        response = self.api.patch(f'/api/v1/admin/orders/{order.pk}/', {'status': Order.Status.PENDING})
+
+        self.assertEqual(response.status_code, 400)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.COMPLETED)
+
+    def test_concurrent_status_change_returns_409(self):
+        order = self.create_order()
+        can_transition = Order.can_transition
+
+        def changed_meanwhile(instance, status):
+            # another request moves the order after it was loaded, before our UPDATE
+            Order.objects.filter(pk=instance.pk).update(status=Order.Status.CANCELED)
+            return can_transition(instance, status)
+
+        with mock.patch.object(Order, 'can_transition', changed_meanwhile):
+            response = self.api.patch(f'/api/v1/admin/orders/{order.pk}/', {'status': Order.Status.PAID})
+
+        self.assertEqual(response.status_code, 409)
+        order.refresh_from_db()
+        self.assertNotEqual(order.status, Order.Status.PAID)
+
+
+class BulkTransitionTests(BaseTestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_results_per_order(self):
+        first = self.create_order(worker=self.worker)
+        second = self.create_order(worker=self.worker)
+        completed = self.create_order(worker=self.worker, status=Order.Status.COMPLETED)
+        ids = [first.id, second.id, completed.id, 999999]
+
+        response = self.api.post('/api/v1/admin/orders/bulk-transition/',
+                                 {'ids': ids, 'status': Order.Status.IN_PROCESS}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'id': first.id, 'result': 'ok', 'status': Order.Status.IN_PROCESS},
+            {'id': second.id, 'result': 'ok', 'status': Order.Status.IN_PROCESS},
+            {'id': completed.id, 'result': 'conflict', 'status': Order.Status.COMPLETED},
+            {'id': 999999, 'result': 'not_found'},
+        ])
+        self.assertEqual(Order.objects.filter(status=Order.Status.IN_PROCESS).count(), 2)
+
+    def test_one_notification_per_order_and_one_event_per_receiver(self):
+        orders = [self.create_order(worker=self.worker) for _ in range(3)]
+        OutboxMessage.objects.all().delete()
+
+        self.api.post('/api/v1/admin/orders/bulk-transition/',
+                      {'ids': [order.id for order in orders], 'status': Order.Status.IN_PROCESS}, format='json')
+        notifications = Notification.objects.filter(status=Order.Status.IN_PROCESS, receiver=self.client_user)
+        self.assertEqual(sorted(notifications.values_list('order_id', flat=True)), [order.id for order in orders])
+        events = {message.group: message.payload for message in OutboxMessage.objects.all()}
+        self.assertEqual(set(events), {f"user_{self.client_user.id}", "admin_group"})
+        self.assertEqual(sorted(events[f"user_{self.client_user.id}"]['order_ids']), [order.id for order in orders])
+        self.assertEqual(events["admin_group"]['id'], max(notifications.values_list('id', flat=True)))
+
+
+class DirtyFieldsTests(BaseTestCase):
+    def test_save_writes_only_changed_fields(self):
+        order = Order.objects.get(pk=self.create_order().pk)
+        order.description = 'Kran oqyapti'
+
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "apps_order"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"description"', updates[0])
+        self.assertIn('"updated_at"', updates[0])
+        self.assertNotIn('"price"', updates[0])
+        self.assertNotIn('"status"', updates[0])
+        self.assertFalse(order.changed_fields)
+
+    def test_fields_left_out_of_update_fields_stay_dirty(self):
+        order = Order.objects.get(pk=self.create_order().pk)
+        order.description = 'Kran oqyapti'
+        order.price = 555
+
+        order.save(update_fields=['price'])
+        self.assertEqual(order.changed_fields, ['description'])
+        order.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.description, 'Kran oqyapti')
+        self.assertEqual(order.price, 555)
+
+    def test_transition_keeps_other_pending_changes(self):
+        order = Order.objects.get(pk=self.create_order().pk)
+        order.description = 'Kran oqyapti'
+
+        self.assertTrue(order.transition(Order.Status.PAID))
+        order.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.description, 'Kran oqyapti')
+
+    def test_refresh_from_db_takes_a_new_snapshot(self):
+        order = Order.objects.get(pk=self.create_order(worker=self.worker).pk)
+        Order.objects.filter(pk=order.pk).update(status=Order.Status.PAID)
+
+        order.refresh_from_db()
+        self.assertEqual(order.changed_fields, [])
+        notifications = Notification.objects.count()
+        order.description = 'Kran oqyapti'
+        order.save()
+
+        # the status wasn't changed by this instance, no status notification and no rollup move
+        self.assertEqual(Notification.objects.count(), notifications)
+        self.assertFalse(OrderStat.objects.filter(status=Order.Status.PAID).exists())
+
+    def test_arefresh_from_db_takes_a_new_snapshot(self):
+        order = Order.objects.get(pk=self.create_order().pk)
+        Order.objects.filter(pk=order.pk).update(status=Order.Status.PAID, price=7)
+
+        async_to_sync(order.arefresh_from_db)(fields=['status'])
+        self.assertFalse(order.has_changed('status'))
+        self.assertEqual(order.status, Order.Status.PAID)
@@ -0,0 +1,41 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from apps.models import Order, OutboxMessage
+from apps.tests.base import BaseTestCase
+
+
+class OutboxTests(BaseTestCase):
+    def receive(self, group: str):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(group, channel)
+        return layer, channel
+
+    def test_event_is_sent_after_commit(self):
+        layer, channel = self.receive(f"user_{self.worker.id}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = self.create_order(worker=self.worker)
+
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event['type'], 'send_message')
+        self.assertEqual(event['order_id'], order.id)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_rolled_back_order_sends_nothing(self):
+        layer, channel = self.receive(f"user_{self.worker.id}")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.create_order(worker=self.worker)
+                raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertFalse(Order.objects.exists())
+        with self.assertRaises(asyncio.TimeoutError):
+            async_to_sync(asyncio.wait_for)(layer.receive(channel), 0.1)
@@ -0,0 +1,33 @@
+import base64
+import json
+
+from rest_framework.test import APIClient
+
+from apps.tests.base import BaseTestCase
+
+
+class KeysetPaginationTests(BaseTestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_cursor_round_trip_returns_every_order_once(self):
+        ids = [self.create_order().id for _ in range(25)]
+
+        seen = []
+        url = '/api/v1/admin/orders/?page_size=10'
+        while url:
+            response = self.api.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [order['id'] for order in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+    def test_invalid_cursor_returns_404(self):
+        self.create_order()
+        wrong_types = base64.urlsafe_b64encode(json.dumps(["abc", "def"]).encode()).decode()
+
+        for cursor in ('not-base64!', wrong_types):
+            response = self.api.get('/api/v1/admin/orders/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,24 @@
+from django.core.cache import cache
+
+from apps.tests.base import BaseTestCase
+from apps.utils.presence import PresenceService
+
+
+class PresenceTests(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_online_until_last_connection_of_all_processes(self):
+        # ikki process, kesh umumiy
+        first, second = PresenceService(), PresenceService()
+        user_id = self.worker.pk
+        await first.connect(user_id)
+        await second.connect(user_id)
+        await second.connect(user_id)
+
+        await first.disconnect(user_id)
+        self.assertEqual(first.online_among([user_id]), [user_id])
+        await second.disconnect(user_id)
+        self.assertEqual(second.online_among([user_id]), [user_id])
+        await second.disconnect(user_id)
+        self.assertEqual(first.online_among([user_id]), [])
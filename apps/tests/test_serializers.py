@@ -0,0 +1,39 @@
+from apps.models import Order, Notification, Transaction
+from apps.serializers import (OrderSerializer, TransactionListModelSerializer, OrderFlatSerializer,
+                              NotificationFlatSerializer, TransactionListFlatSerializer)
+from apps.serializers.user_serializers import NotificationSerializer
+from apps.tests.base import BaseTestCase
+
+
+class FlatSerializerTests(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.taken = Order.objects.create(client=cls.client_user, worker=cls.worker, service=cls.service, price=150,
+                                         description='Kran oqyapti')
+        cls.available = Order.objects.create(client=cls.client_user, service=cls.service, price=100)
+        Notification.objects.create(sender=cls.admin, receiver=cls.client_user, message='Xabar')
+        Transaction.objects.create(user=cls.client_user, order=cls.taken, amount=150,
+                                   payment_type=Transaction.PaymentType.CLICK)
+
+    def assertSameOutput(self, queryset, serializer, flat):
+        self.assertEqual(flat.to_representation(flat.values(queryset)), serializer(list(queryset)).data)
+
+    def test_orders(self):
+        orders = Order.objects.order_by('id')
+        self.assertSameOutput(orders, lambda rows: OrderSerializer(rows, many=True), OrderFlatSerializer())
+        self.assertSameOutput(orders, lambda rows: OrderSerializer(rows, many=True, nested_service=False),
+                              OrderFlatSerializer(nested_service=False))
+        self.assertSameOutput(orders, lambda rows: OrderSerializer(rows, many=True, fields=['id', 'status']),
+                              OrderFlatSerializer(fields=['id', 'status']))
+
+    def test_notifications(self):
+        # sistemaviy xabar: order va sender yo'q
+        Notification.objects.create(receiver=self.worker, message='Tizim')
+        self.assertSameOutput(Notification.objects.order_by('id'),
+                              lambda rows: NotificationSerializer(rows, many=True), NotificationFlatSerializer())
+
+    def test_transactions(self):
+        self.assertSameOutput(Transaction.objects.order_by('id'),
+                              lambda rows: TransactionListModelSerializer(rows, many=True),
+                              TransactionListFlatSerializer())
@@ -0,0 +1,30 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from apps.models import Notification
+from apps.tests.base import BaseTestCase
+from apps.utils.unread import get_unread_count, incr_unread
+
+
+class UnreadCounterTests(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counter_follows_new_notifications(self):
+        self.assertEqual(get_unread_count(self.client_user.pk), 0)
+        Notification.objects.create(sender=self.worker, receiver=self.client_user, message='yangi')
+        incr_unread(self.client_user.pk)
+        self.assertEqual(get_unread_count(self.client_user.pk), 1)
+
+    def test_notification_committed_during_fill(self):
+        def count_then_notify():
+            count = Notification.objects.filter(receiver=self.client_user, is_read=False).count()
+            Notification.objects.create(sender=self.worker, receiver=self.client_user, message='yangi')
+            incr_unread(self.client_user.pk)
+            return count
+
+        with mock.patch('apps.utils.unread.Notification') as model:
+            model.objects.filter.return_value.count.side_effect = count_then_notify
+            self.assertEqual(get_unread_count(self.client_user.pk), 0)
+        self.assertEqual(get_unread_count(self.client_user.pk), 1)
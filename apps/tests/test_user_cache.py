@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.models import User
+from apps.tests.base import BaseTestCase
+from apps.utils.user_cache import user_cache, get_cached_user, version_key
+
+
+class UserCacheTests(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.client_user)}")
+
+    def test_user_changed_in_another_process(self):
+        urls = reverse('services-list'), reverse('async_me')
+        for url in urls:
+            self.assertEqual(self.api.get(url).status_code, 200)
+        # boshqa process: lokal keshga tegmaydi, faqat umumiy versiyani o'zgartiradi
+        User.objects.filter(id=self.client_user.id).update(is_active=False)
+        for url in urls:
+            self.assertEqual(self.api.get(url).status_code, 200)
+        cache.set(version_key(self.client_user.id), 'other')
+        for url in urls:
+            self.assertEqual(self.api.get(url).status_code, 401)
+
+    def test_hit_doesnt_query_the_database(self):
+        get_cached_user(self.worker.id, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.worker.id, 1), self.worker)
+
+    def test_save_invalidates(self):
+        get_cached_user(self.worker.id, 1)
+        user = User.objects.get(id=self.worker.id)
+        user.role = User.Role.ADMIN
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(get_cached_user(self.worker.id, 1).role, User.Role.ADMIN)
+
+    def test_hits_are_copies(self):
+        get_cached_user(self.worker.id, 1).role = User.Role.ADMIN
+        self.assertEqual(get_cached_user(self.worker.id, 1).role, User.Role.WORKER)
+
+    def test_user_loaded_before_a_change_isnt_cached(self):
+        generation = user_cache.generation(self.worker.id)
+        user_cache.invalidate(self.worker.id)
+        user_cache.set(self.worker.id, 1, self.worker, generation)
+        self.assertIsNone(user_cache.get(self.worker.id, 1))
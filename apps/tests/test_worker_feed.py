@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from apps.models import Order, User, WorkerFeedEntry
+from apps.tests.base import BaseTestCase
+
+
+class WorkerFeedTests(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_worker = User.objects.create(username='other_worker', role=User.Role.WORKER)
+        cls.other_worker.specialties.add(cls.service)
+
+    def feed(self, worker) -> list:
+        return list(WorkerFeedEntry.objects.filter(worker=worker).values_list('order_id', flat=True))
+
+    def test_transition_removes_taken_order(self):
+        order = self.create_order()
+        self.assertEqual(self.feed(self.other_worker), [order.id])
+        order.transition(Order.Status.IN_PROCESS, worker=self.worker)
+        self.assertEqual(self.feed(self.other_worker), [])
+
+    def test_transition_adds_released_order(self):
+        order = self.create_order(worker=self.worker)
+        self.assertEqual(self.feed(self.other_worker), [])
+        order.transition(Order.Status.PAID, worker=None)
+        self.assertEqual(self.feed(self.other_worker), [order.id])
+
+    def test_migrate_specialties_builds_feeds(self):
+        order = self.create_order()
+        migrated = User.objects.create(username='migrated', role=User.Role.WORKER, specialty='santexnika, elektrik')
+        call_command('migrate_specialties', stdout=StringIO())
+        self.assertEqual(self.feed(migrated), [order.id])
@@ -5,7 +5,11 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from apps.views import RegisterView, LoginAPIView, ServiceViewSet, OrderViewSet, \
     orders_dashboard, TransactionCreateAPIView, TransactionClickCheckAPIView, \
     TransactionPaymeCheckAPIView, TransactionListAPIVew, TransactionRetrieveAPIView, ClickQRAPIView
-from apps.views.users import UserAdminViewSet, NotificationViewSet, MeView
+from apps.views.async_views import AsyncOrderListView, AsyncOrderDetailView, AsyncNotificationListView, \
+    AsyncCheckOrderView, AsyncMeView
+from apps.views.exports import OrderExportAPIView, TransactionExportAPIView
+from apps.views.users import UserAdminViewSet, NotificationViewSet, MeView, NotificationUnreadCountView, \
+    NotificationMarkReadView
 
 router = DefaultRouter()
 router.register(r'users', UserAdminViewSet, basename='users-admin')
@@ -22,14 +26,27 @@ urlpatterns = [
 
     # notifications
     path('notifications/', NotificationViewSet.as_view(), name='notifications'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notifications_unread_count'),
+    path('notifications/mark-read/', NotificationMarkReadView.as_view(), name='notifications_mark_read'),
     path('notification-page/', orders_dashboard, name='notification_page'),
 
     # Profile
     path('me/', MeView.as_view(), name='me'),
 
+    # Exports
+    path('export/orders/', OrderExportAPIView.as_view(), name='export_orders'),
+    path('export/transactions/', TransactionExportAPIView.as_view(), name='export_transactions'),
+
     # Admin user management
     path('admin/', include(router.urls)),
 
+    # Async (ASGI) variants of the hot read endpoints
+    path('async/orders/', AsyncOrderListView.as_view(), name='async_orders'),
+    path('async/orders/<int:pk>/', AsyncOrderDetailView.as_view(), name='async_order_detail'),
+    path('async/notifications/', AsyncNotificationListView.as_view(), name='async_notifications'),
+    path('async/check-order/<int:order_id>', AsyncCheckOrderView.as_view(), name='async_check_order'),
+    path('async/me/', AsyncMeView.as_view(), name='async_me'),
+
     # Payment
     path('payment', TransactionCreateAPIView.as_view(), name='payment'),
     path('payment/click', TransactionClickCheckAPIView.as_view(), name='payment_click_check'),
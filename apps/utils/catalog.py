@@ -0,0 +1,77 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from apps.models import Service
+
+VERSION_KEY = "services:catalog:version"
+CATALOG_TIMEOUT = 60 * 60 * 24
+
+
+def catalog_key(version) -> str:
+    return f"services:catalog:{version}"
+
+
+def new_version() -> int:
+    # time based, so a version lost with the cache never repeats an ETag clients still hold
+    return time.time_ns()
+
+
+def get_catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, new_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    cache.set(VERSION_KEY, new_version(), None)
+
+
+class ServiceCatalog:
+    """
+    Serialized service list cached per catalog version.
+    The last built version is also kept in the process, so a request costs one cache GET for the version.
+    """
+
+    def __init__(self):
+        self._local = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(version) -> str:
+        return f'"services-{version}"'
+
+    @staticmethod
+    def last_modified(version) -> int:
+        # the version is the time of the last change, unlike Max(updated_at) it doesn't go back on a delete
+        return version // 10 ** 9
+
+    def build(self, version) -> dict:
+        from apps.serializers import ServiceSerializer
+
+        return {
+            "version": version,
+            "etag": self.etag(version),
+            "last_modified": self.last_modified(version),
+            "data": ServiceSerializer(Service.objects.all(), many=True).data,
+        }
+
+    def get(self, version=None) -> dict:
+        if version is None:
+            version = get_catalog_version()
+        local = self._local
+        if local is not None and local["version"] == version:
+            return local
+        catalog = cache.get(catalog_key(version))
+        if catalog is None:
+            catalog = self.build(version)
+            cache.set(catalog_key(version), catalog, CATALOG_TIMEOUT)
+        with self._lock:
+            self._local = catalog
+        return catalog
+
+
+service_catalog = ServiceCatalog()
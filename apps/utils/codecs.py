@@ -0,0 +1,52 @@
+import msgpack
+import ujson
+
+
+class JSONCodec:
+    """
+    Default codec, JSON text frames.
+    """
+    name = 'json'
+    binary = False
+    errors = (ValueError,)
+
+    def encode(self, content) -> str:
+        return ujson.dumps(content)
+
+    def decode(self, data):
+        return ujson.loads(data)
+
+
+class MsgpackCodec:
+    """
+    Binary frames for clients which offer the `msgpack` WebSocket subprotocol.
+    """
+    name = 'msgpack'
+    binary = True
+    errors = (ValueError, msgpack.UnpackException)
+
+    def encode(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+json_codec = JSONCodec()
+msgpack_codec = MsgpackCodec()
+
+
+def event_content(event: dict) -> dict:
+    """
+    Client visible part of a channel layer event.
+    """
+    return {key: value for key, value in event.items() if key not in ('type', 'frames')}
+
+
+def attach_frames(event: dict) -> dict:
+    """
+    Encode the event content once per codec before group_send,
+    so consumers forward the same bytes to every group member instead of encoding it again.
+    """
+    content = event_content(event)
+    return {**event, 'frames': {codec.name: codec.encode(content) for codec in (json_codec, msgpack_codec)}}
@@ -0,0 +1,10 @@
+from rest_framework.exceptions import APIException
+
+
+class OrderStatusConflict(APIException):
+    """
+    The order's status was changed by another request between the read and the UPDATE.
+    """
+    status_code = 409
+    default_detail = "Buyurtma holati boshqa so'rov tomonidan o'zgartirildi, qaytadan urinib ko'ring."
+    default_code = 'conflict'
@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.models import Order, OrderStat
+
+BATCH_SIZE = 1000
+# fields of the order that move it to another rollup row
+KEY_FIELDS = 'created_at', 'service', 'worker', 'status', 'price'
+
+
+def stat_key(created_at, service_id, worker_id, status) -> tuple:
+    return timezone.localdate(created_at), service_id, worker_id, status
+
+
+def order_key(order, values: dict = None) -> tuple:
+    """
+    Rollup key of the order, `values` ({attname: value}) override the current attributes.
+    """
+    values = values or {}
+
+    def value(attname):
+        return values.get(attname, getattr(order, attname))
+
+    return stat_key(value('created_at'), value('service_id'), value('worker_id'), value('status'))
+
+
+def apply_deltas(deltas: dict) -> None:
+    """
+    deltas: {(day, service_id, worker_id, status): [count, total]}
+    Every key is one UPDATE, the row is created when it doesn't exist yet.
+    """
+    for (day, service_id, worker_id, status), (count, total) in deltas.items():
+        if not count and not total:
+            continue
+        key = {'day': day, 'service_id': service_id, 'worker_id': worker_id, 'status': status}
+        changes = {'count': F('count') + count, 'total': F('total') + total}
+        if OrderStat.objects.filter(**key).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                OrderStat.objects.create(**key, count=count, total=total)
+        except IntegrityError:
+            # created by a concurrent transaction meanwhile
+            OrderStat.objects.filter(**key).update(**changes)
+
+
+def add(deltas: dict, key: tuple, count: int, total) -> None:
+    delta = deltas.setdefault(key, [0, Decimal(0)])
+    delta[0] += count
+    delta[1] += total
+
+
+def order_created(order) -> None:
+    apply_deltas({order_key(order): [1, order.price]})
+
+
+def order_changed(order, old_values: dict) -> None:
+    """
+    old_values: {attname: value} of the fields written by the update.
+    """
+    deltas = {}
+    add(deltas, order_key(order, old_values), -1, -old_values.get('price', order.price))
+    add(deltas, order_key(order), 1, order.price)
+    apply_deltas(deltas)
+
+
+def order_saved(order) -> None:
+    changed = [name for name in KEY_FIELDS if order.has_changed(name)]
+    if changed:
+        order_changed(order, {order._attname(name): order.old_value(name) for name in changed})
+
+
+def order_deleted(order) -> None:
+    apply_deltas({order_key(order): [-1, -order.price]})
+
+
+def orders_status_changed(orders, old_statuses: dict) -> None:
+    deltas = {}
+    for order in orders:
+        add(deltas, order_key(order, {'status': old_statuses[order.pk]}), -1, -order.price)
+        add(deltas, order_key(order), 1, order.price)
+    apply_deltas(deltas)
+
+
+def rebuild() -> int:
+    """
+    Recompute the whole rollup from the orders table with one GROUP BY.
+    """
+    rows = (
+        Order.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'service_id', 'worker_id', 'status')
+        .annotate(count=Count('id'), total=Sum('price'))
+        .order_by()
+    )
+    with transaction.atomic():
+        OrderStat.objects.all().delete()
+        stats = OrderStat.objects.bulk_create(
+            (OrderStat(**row) for row in rows.iterator(chunk_size=BATCH_SIZE)), batch_size=BATCH_SIZE
+        )
+    return len(stats)
+
+
+def summarize(queryset, group_by) -> list:
+    """
+    Sums of the rollup rows grouped by the given key fields, empty groups are left out.
+    """
+    rows = (
+        queryset.values(*group_by)
+        .annotate(orders=Sum('count'), amount=Sum('total'))
+        .filter(orders__gt=0)
+        .order_by(*group_by)
+    )
+    return [
+        {**{name: row[name] for name in group_by}, 'count': row['orders'], 'total': row['amount']}
+        for row in rows
+    ]
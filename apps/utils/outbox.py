@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.models import OutboxMessage
+from apps.utils.codecs import attach_frames
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_setting(name: str, default=None):
+    return getattr(settings, 'OUTBOX', {}).get(name, default)
+
+
+def enqueue(group: str, event: dict) -> OutboxMessage:
+    """
+    Store a channel layer event in the outbox.
+    Must be called inside the transaction that produced the event,
+    the message is sent only after that transaction is committed.
+    """
+    message = OutboxMessage.objects.create(group=group, payload=event)
+    transaction.on_commit(schedule_dispatch)
+    return message
+
+
+def enqueue_many(messages: list) -> list:
+    """
+    Bulk version of enqueue, messages is a list of (group, event) pairs.
+    """
+    created = OutboxMessage.objects.bulk_create(
+        [OutboxMessage(group=group, payload=event) for group, event in messages]
+    )
+    transaction.on_commit(schedule_dispatch)
+    return created
+
+
+async def _send_batch(batch: list) -> None:
+    """
+    Pipeline group_send calls: different groups are sent concurrently,
+    messages of the same group keep their outbox order.
+    Frames are encoded here once per group_send, not by every group member.
+    """
+    layer = get_channel_layer()
+    by_group = defaultdict(list)
+    for message in batch:
+        by_group[message.group].append(attach_frames(message.payload))
+
+    async def send_group(group, events):
+        for event in events:
+            await layer.group_send(group, event)
+
+    await asyncio.gather(*(send_group(group, events) for group, events in by_group.items()))
+
+
+def dispatch_outbox(batch_size: int = None) -> int:
+    """
+    Drain the outbox in batches and return the number of sent messages.
+    Locked rows are skipped, so several dispatchers can run at the same time.
+    """
+    batch_size = batch_size or outbox_setting('BATCH_SIZE', 100)
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+            )
+            if not batch:
+                return sent
+            async_to_sync(_send_batch)(batch)
+            OutboxMessage.objects.filter(id__in=[message.id for message in batch]).delete()
+        sent += len(batch)
+
+
+class OutboxDispatcher:
+    """
+    Background thread which drains the outbox when it is woken up,
+    so the request that saved an order doesn't wait for Redis.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                dispatch_outbox()
+            except Exception as error:
+                logger.error("Outbox dispatch failed: %s", error)
+            finally:
+                close_old_connections()
+
+
+dispatcher = OutboxDispatcher()
+
+
+def schedule_dispatch() -> None:
+    if outbox_setting('DISPATCH_IN_THREAD', True):
+        dispatcher.wake()
+    else:
+        dispatch_outbox()
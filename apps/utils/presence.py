@@ -0,0 +1,88 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.models import User
+
+
+def presence_setting(name: str, default):
+    return getattr(settings, 'PRESENCE', {}).get(name, default)
+
+
+class PresenceService:
+    """
+    Online state lives in the cache as `presence:<user_id>` keys refreshed by heartbeats,
+    a user is online while the key hasn't expired.
+    Open connections of all processes are counted in `presence:<user_id>:connections`,
+    the presence key is deleted when the last of them closes.
+    last_seen is buffered in the process and written to the database in batches.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"presence:{user_id}"
+
+    @staticmethod
+    def connections_key(user_id) -> str:
+        return f"presence:{user_id}:connections"
+
+    async def touch(self, user_id) -> None:
+        now = timezone.now()
+        timeout = presence_setting('TTL', 60)
+        await cache.aset(self.key(user_id), now.timestamp(), timeout)
+        # the counter expires with the presence key, so connections of a crashed process don't stay counted
+        await cache.atouch(self.connections_key(user_id), timeout)
+        with self._lock:
+            self._pending[user_id] = now
+
+    async def connect(self, user_id) -> None:
+        key = self.connections_key(user_id)
+        if not await cache.aadd(key, 1, presence_setting('TTL', 60)):
+            try:
+                await cache.aincr(key)
+            except ValueError:
+                # expired between add() and incr()
+                await cache.aset(key, 1, presence_setting('TTL', 60))
+        await self.touch(user_id)
+
+    async def disconnect(self, user_id) -> None:
+        with self._lock:
+            self._pending[user_id] = timezone.now()
+        try:
+            remaining = await cache.adecr(self.connections_key(user_id))
+        except ValueError:
+            remaining = 0
+        if remaining <= 0:
+            await cache.adelete_many([self.key(user_id), self.connections_key(user_id)])
+
+    def online_among(self, user_ids) -> list:
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        found = cache.get_many(keys.keys())
+        return [keys[key] for key in found]
+
+    def flush_due(self) -> bool:
+        return time.monotonic() - self._flushed_at >= presence_setting('FLUSH_INTERVAL', 30)
+
+    def flush_last_seen(self) -> int:
+        """
+        Write buffered last_seen values with one bulk UPDATE per batch.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        users = [User(id=user_id, last_seen=last_seen) for user_id, last_seen in pending.items()]
+        User.objects.bulk_update(users, ['last_seen'], batch_size=presence_setting('BATCH_SIZE', 500))
+        return len(users)
+
+
+presence = PresenceService()
@@ -0,0 +1,30 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+    `rate` tokens are added every second up to `burst`, every allowed message takes one token.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def has_token(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def consume(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
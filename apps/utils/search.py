@@ -0,0 +1,50 @@
+import re
+
+from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Value, F, FloatField
+from django.db.models.functions import Cast
+
+# "simple" doesn't stem, there is no uzbek dictionary in Postgres
+SEARCH_CONFIG = 'simple'
+WORD_RE = re.compile(r'\w+')
+
+
+def search_enabled() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def order_search_vector(service_name: str, description: str = None):
+    """
+    UPDATE can't join, so the service name is passed as a value.
+    An INSERT can't reference columns, `description` passes the description as a value too.
+    """
+    description = 'description' if description is None else Value(description)
+    return (SearchVector(Value(service_name), weight='A', config=SEARCH_CONFIG)
+            + SearchVector(description, weight='B', config=SEARCH_CONFIG))
+
+
+def update_search_vector(queryset, service_name: str) -> int:
+    if not search_enabled():
+        return 0
+    return queryset.update(search_vector=order_search_vector(service_name))
+
+
+def prefix_query(text: str) -> SearchQuery | None:
+    """
+    "san tex" -> 'san':* & 'tex':*, every word is matched as a prefix.
+    """
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    raw = ' & '.join(f"'{word}':*" for word in words)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_orders(queryset, text: str):
+    query = prefix_query(text)
+    if query is None:
+        return queryset.none()
+    # float8, so the rank in the pagination cursor compares equal after a round trip
+    rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(rank=rank)
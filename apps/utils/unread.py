@@ -0,0 +1,74 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.models import Notification
+
+UNREAD_TIMEOUT = 60 * 60 * 24
+# COUNT dan uzoqroq bo'lishi kerak
+MISSED_TIMEOUT = 60 * 5
+
+
+def unread_key(user_id) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def missed_key(user_id) -> str:
+    return f"notifications:unread:{user_id}:missed"
+
+
+def counter_missed(user_id) -> None:
+    """
+    Called when a change found no counter to update: a fill running meanwhile may have counted without it.
+    """
+    cache.set(missed_key(user_id), uuid.uuid4().hex, MISSED_TIMEOUT)
+
+
+def get_unread_count(user_id) -> int:
+    """
+    Unread badge counter.
+    Served from the cache, the COUNT query runs only when the counter is missing.
+    """
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        missed = cache.get(missed_key(user_id))
+        count = Notification.objects.filter(receiver_id=user_id, is_read=False).count()
+        # add() doesn't overwrite a counter that was created meanwhile
+        cache.add(unread_key(user_id), count, UNREAD_TIMEOUT)
+        if cache.get(missed_key(user_id)) != missed:
+            # a change committed during the COUNT wasn't applied to the new counter
+            cache.delete(unread_key(user_id))
+    return count
+
+
+def incr_unread(user_id, delta: int = 1) -> None:
+    try:
+        cache.incr(unread_key(user_id), delta)
+    except ValueError:
+        # counter is not cached yet, it will be counted on the next read
+        counter_missed(user_id)
+
+
+def incr_unread_many(counts: dict) -> None:
+    for user_id, delta in counts.items():
+        incr_unread(user_id, delta)
+
+
+def decr_unread(user_id, delta: int = 1) -> None:
+    if not delta:
+        return
+    try:
+        if cache.decr(unread_key(user_id), delta) < 0:
+            cache.delete(unread_key(user_id))
+    except ValueError:
+        counter_missed(user_id)
+
+
+def mark_read(user_id, up_to: int) -> int:
+    """
+    Mark all notifications of the user up to the given id as read with one UPDATE.
+    """
+    updated = Notification.objects.filter(receiver_id=user_id, is_read=False, id__lte=up_to).update(is_read=True)
+    transaction.on_commit(lambda: decr_unread(user_id, updated))
+    return updated
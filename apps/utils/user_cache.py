@@ -0,0 +1,132 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class UserSnapshotCache:
+    """
+    Process local TTL bounded LRU of user instances keyed by (user_id, token iat).
+    Entries are invalidated from User post_save/post_delete signals, a copy is returned
+    on every hit so connections can't change each other's user object.
+    Each entry keeps the shared user version it was loaded with, a hit with another version
+    is a miss: that's how a change made in another process reaches this one.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = defaultdict(set)
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def generation(self, user_id) -> int:
+        with self._lock:
+            return self._generations[str(user_id)]
+
+    def get(self, user_id, issued_at=None, version=None):
+        # token claims keep user_id as a string
+        user_id = str(user_id)
+        key = (user_id, issued_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_version, user = entry
+            if expires_at < time.monotonic() or entry_version != version:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(user)
+
+    def set(self, user_id, issued_at, user, generation: int = None, version=None) -> None:
+        user_id = str(user_id)
+        key = (user_id, issued_at)
+        with self._lock:
+            # user was changed while it was being loaded from the database
+            if generation is not None and generation != self._generations[user_id]:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, version, copy.copy(user))
+            self._entries.move_to_end(key)
+            self._keys_by_user[user_id].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id) -> None:
+        user_id = str(user_id)
+        with self._lock:
+            self._generations[user_id] += 1
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+WS_USER_CACHE = getattr(settings, 'WS_USER_CACHE', {})
+
+user_cache = UserSnapshotCache(
+    max_size=WS_USER_CACHE.get('MAX_SIZE', 10000),
+    ttl=WS_USER_CACHE.get('TTL', 300),
+)
+
+
+def version_key(user_id) -> str:
+    return f"users:version:{user_id}"
+
+
+def bump_user_version(user_id) -> None:
+    """
+    Invalidate the user in every process. The key outlives the entries loaded before it was set,
+    after it expires they are gone too.
+    """
+    user_cache.invalidate(user_id)
+    cache.set(version_key(user_id), uuid.uuid4().hex, user_cache.ttl)
+
+
+def get_cached_user(user_id, issued_at, version=None):
+    """
+    User for a token from the cache, loaded from the database on a miss. None if it doesn't exist.
+    """
+    from django.contrib.auth import get_user_model
+
+    if version is None:
+        version = cache.get(version_key(user_id))
+    user = user_cache.get(user_id, issued_at, version)
+    if user is not None:
+        return user
+    generation = user_cache.generation(user_id)
+    user = get_user_model().objects.filter(id=user_id).first()
+    if user is None:
+        return None
+    user_cache.set(user_id, issued_at, user, generation, version)
+    return user
+
+
+async def aget_cached_user(user_id, issued_at):
+    """
+    get_cached_user for async code, the miss goes through database_sync_to_async, which closes stale
+    and over-age connections around the query.
+    """
+    from channels.db import database_sync_to_async
+
+    version = await cache.aget(version_key(user_id))
+    user = user_cache.get(user_id, issued_at, version)
+    if user is not None:
+        return user
+    return await database_sync_to_async(get_cached_user)(user_id, issued_at, version)
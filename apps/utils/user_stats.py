@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.models import User
+
+STATS_KEY = "users:stats"
+# bulk_create/update() skip the invalidating signals, so the counts expire anyway
+STATS_TIMEOUT = 60 * 10
+
+
+def get_user_stats() -> dict:
+    """
+    Users per role from one conditional aggregation query, cached until a user is created,
+    deleted or changes role.
+    """
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        stats = User.objects.aggregate(
+            total=Count('id'),
+            clients=Count('id', filter=Q(role=User.Role.CLIENT)),
+            workers=Count('id', filter=Q(role=User.Role.WORKER)),
+            admins=Count('id', filter=Q(role=User.Role.ADMIN)),
+        )
+        cache.set(STATS_KEY, stats, STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_user_stats() -> None:
+    cache.delete(STATS_KEY)
@@ -0,0 +1,82 @@
+from apps.models import Order, User, WorkerFeedEntry
+
+BATCH_SIZE = 1000
+
+
+def available_orders():
+    return Order.objects.filter(worker__isnull=True, status__in=(Order.Status.PENDING, Order.Status.PAID))
+
+
+def add_order(order: Order) -> None:
+    """
+    Fan out a new available order to every worker who handles its service.
+    """
+    worker_ids = User.specialties.through.objects.filter(service_id=order.service_id).values_list('user_id', flat=True)
+    entries = [
+        WorkerFeedEntry(worker_id=worker_id, order_id=order.id, created_at=order.created_at) for worker_id in worker_ids
+    ]
+    WorkerFeedEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=BATCH_SIZE)
+
+
+def remove_orders(order_ids) -> None:
+    WorkerFeedEntry.objects.filter(order_id__in=order_ids).delete()
+
+
+def sync_order(order: Order, created: bool = False, old_values: dict = None) -> None:
+    """
+    Keep the feed in sync after an order write.
+    old_values ({attname: value before the write}) is given when the order is already snapshotted,
+    as in the status_changed signal of Order.transition().
+    """
+    if created:
+        if order.is_available:
+            add_order(order)
+        return
+
+    def has_changed(name):
+        if old_values is None:
+            return order.has_changed(name)
+        return name in old_values and old_values[name] != getattr(order, name)
+
+    if not (has_changed('worker_id') or has_changed('status') or has_changed('service_id')):
+        return
+    if has_changed('service_id') or not order.is_available:
+        remove_orders([order.id])
+    if order.is_available:
+        add_order(order)
+
+
+def rebuild_worker(worker_id) -> int:
+    WorkerFeedEntry.objects.filter(worker_id=worker_id).delete()
+    service_ids = User.specialties.through.objects.filter(user_id=worker_id).values_list('service_id', flat=True)
+    rows = available_orders().filter(service_id__in=service_ids).values_list('id', 'created_at')
+    entries = [
+        WorkerFeedEntry(worker_id=worker_id, order_id=order_id, created_at=created_at)
+        for order_id, created_at in rows.iterator(chunk_size=BATCH_SIZE)
+    ]
+    WorkerFeedEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=BATCH_SIZE)
+    return len(entries)
+
+
+def rebuild_all() -> int:
+    """
+    Rebuild the whole feed from the orders table.
+    """
+    WorkerFeedEntry.objects.all().delete()
+    workers_by_service = {}
+    for user_id, service_id in User.specialties.through.objects.values_list('user_id', 'service_id').iterator():
+        workers_by_service.setdefault(service_id, []).append(user_id)
+
+    created = 0
+    batch = []
+    rows = available_orders().filter(service_id__in=workers_by_service.keys())
+    for order_id, service_id, created_at in rows.values_list('id', 'service_id', 'created_at').iterator(
+            chunk_size=BATCH_SIZE):
+        for worker_id in workers_by_service[service_id]:
+            batch.append(WorkerFeedEntry(worker_id=worker_id, order_id=order_id, created_at=created_at))
+        if len(batch) >= BATCH_SIZE:
+            WorkerFeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    WorkerFeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    return created + len(batch)
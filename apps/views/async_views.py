@@ -0,0 +1,118 @@
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import NotAuthenticated, AuthenticationFailed, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.models import Transaction, Order
+from apps.paginations import KeysetPagination
+from apps.serializers import TransactionDetailModelSerializer
+from apps.serializers.user_serializers import UserSerializer
+from apps.utils.user_cache import aget_cached_user
+from apps.views.order_services import OrderViewSet
+from apps.views.users import NotificationViewSet
+
+
+def json_response(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    # same bytes as the DRF views render
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Async read endpoints for ASGI.
+    Runs on the event loop: JWT is validated without the database, the user comes from the
+    user cache, and the queries go through the async ORM (aget/aiterator).
+    Query building and serialization reuse the DRF views and serializers.
+    """
+    authentication = JWTAuthentication()
+
+    async def authenticate(self, request):
+        header = self.authentication.get_header(request)
+        raw_token = self.authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            raise NotAuthenticated()
+        token = self.authentication.get_validated_token(raw_token)
+        user = await aget_cached_user(token[api_settings.USER_ID_CLAIM], token.get('iat'))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return user
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except (NotAuthenticated, AuthenticationFailed, NotFound) as exc:
+            # same body and headers as rest_framework.views.exception_handler
+            response = json_response(exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail},
+                                     exc.status_code)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response.headers["WWW-Authenticate"] = self.authentication.authenticate_header(request)
+            return response
+
+    def drf_request(self, request) -> Request:
+        """
+        DRF request for the reused views, serializers and paginators, authenticated with our user.
+        """
+        drf_request = Request(request)
+        drf_request.user = request.user
+        return drf_request
+
+    async def list(self, view) -> HttpResponse:
+        """
+        Async FlatListMixin.list of the view: values() rows, keyset page, flat serializer.
+        """
+        flat = view.get_flat_serializer()
+        paginator = KeysetPagination()
+        ordering = [name.lstrip('-') for name in paginator.get_ordering(view)]
+        rows = await paginator.apaginate_queryset(flat.values(view.get_queryset(), *ordering), view.request, view)
+        return json_response(paginator.get_paginated_response(flat.to_representation(rows)).data)
+
+
+class AsyncOrderListView(AsyncAPIView):
+    """
+    Same as GET admin/orders/ (role filtering, ?fields=, ?service_format=, ?search=, cursor pages).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        view = OrderViewSet(action='list', request=self.drf_request(request), format_kwarg=None, kwargs={})
+        return await self.list(view)
+
+
+class AsyncOrderDetailView(AsyncAPIView):
+    async def get(self, request, pk, *args, **kwargs):
+        view = OrderViewSet(action='retrieve', request=self.drf_request(request), format_kwarg=None,
+                            kwargs={'pk': pk})
+        try:
+            order = await view.get_queryset().aget(pk=pk)
+        except Order.DoesNotExist:
+            raise NotFound("No Order matches the given query.")
+        return json_response(view.get_serializer(order).data)
+
+
+class AsyncNotificationListView(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        view = NotificationViewSet(request=self.drf_request(request), format_kwarg=None, kwargs={})
+        return await self.list(view)
+
+
+class AsyncCheckOrderView(AsyncAPIView):
+    async def get(self, request, order_id, *args, **kwargs):
+        try:
+            transaction = await Transaction.objects.aget(order_id=order_id)
+        except Transaction.DoesNotExist:
+            raise NotFound("No Transaction matches the given query.")
+        return json_response(TransactionDetailModelSerializer(transaction).data)
+
+
+class AsyncMeView(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        user = request.user
+        serializer = UserSerializer(user)
+        # the m2m field would query synchronously, the ids are loaded with aiterator instead
+        serializer.fields.pop('specialties')
+        data = {**serializer.data, 'specialties': [service_id async for service_id in user.get_service_ids()]}
+        return json_response({name: data[name] for name in UserSerializer.Meta.fields})
@@ -0,0 +1,57 @@
+from django.core.handlers.asgi import ASGIRequest
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework.views import APIView
+
+from apps.models import Order, Transaction
+from apps.permissions import IsAdminRole
+from apps.serializers import ExportQuerySerializer
+from apps.utils.exports import stream_export, day_range_filter
+
+EXPORT_RESPONSES = {
+    (200, 'text/csv'): OpenApiResponse(OpenApiTypes.STR),
+    (200, 'application/x-ndjson'): OpenApiResponse(OpenApiTypes.STR),
+}
+
+
+class ExportAPIView(APIView):
+    """
+    Streams the filtered rows of `queryset` as CSV or NDJSON, ordered by id.
+    """
+    permission_classes = IsAdminRole,
+    queryset = None
+    columns = ()
+    status_choices = ()
+    export_name = None
+
+    def get(self, request, *args, **kwargs):
+        serializer = ExportQuerySerializer(data=request.query_params, status_choices=self.status_choices)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = self.queryset.filter(**day_range_filter('created_at', params.get('date_from'),
+                                                           params.get('date_to')))
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return stream_export(queryset.order_by('id'), list(self.columns), params['output'], self.export_name,
+                             asynchronous=isinstance(request._request, ASGIRequest))
+
+
+@extend_schema(tags=['Orders'], description="Buyurtmalarni CSV/NDJSON ko'rinishida yuklab olish (oqim bilan)",
+               parameters=[ExportQuerySerializer], responses=EXPORT_RESPONSES)
+class OrderExportAPIView(ExportAPIView):
+    queryset = Order.objects.all()
+    columns = ('id', 'created_at', 'updated_at', 'status', 'service_id', 'service__name', 'client_id', 'worker_id',
+               'price', 'description')
+    status_choices = Order.Status.choices
+    export_name = 'orders'
+
+
+@extend_schema(tags=['payment'], description="Tranzaksiyalarni CSV/NDJSON ko'rinishida yuklab olish (oqim bilan)",
+               parameters=[ExportQuerySerializer], responses=EXPORT_RESPONSES)
+class TransactionExportAPIView(ExportAPIView):
+    queryset = Transaction.objects.all()
+    columns = ('id', 'created_at', 'updated_at', 'status', 'payment_type', 'amount', 'order_id', 'user_id',
+               'payment_id', 'payme_id', 'state', 'perform_time', 'cancel_time', 'reason')
+    status_choices = Transaction.Status.choices
+    export_name = 'transactions'
@@ -0,0 +1,25 @@
+from rest_framework.response import Response
+
+
+class FlatListMixin:
+    """
+    list() built from QuerySet.values() rows by `flat_serializer_class`,
+    the response (and the schema) is the same as with the view's serializer.
+    """
+    flat_serializer_class = None
+
+    def get_flat_serializer(self):
+        return self.flat_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        flat = self.get_flat_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # keyset pagination reads the cursor position from the rows
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        ordering = [name.lstrip('-') for name in get_ordering(self)] if get_ordering else []
+        rows = flat.values(queryset, *ordering)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(flat.to_representation(page))
+        return Response(flat.to_representation(rows))
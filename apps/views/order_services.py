@@ -1,11 +1,25 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q
-from drf_spectacular.utils import extend_schema
-from rest_framework.exceptions import PermissionDenied
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet, ModelViewSet
 
-from apps.models import Service, Order
-from apps.serializers import ServiceSerializer, OrderCreateSerializer, OrderSerializer
+from apps.authentication import CachedJWTAuthentication
+from apps.models import Service, Order, WorkerFeedEntry, OrderStat
+from apps.paginations import KeysetPagination
+from apps.permissions import IsAdminRole
+from apps.serializers import ServiceSerializer, OrderCreateSerializer, OrderSerializer, BulkTransitionSerializer, \
+    OrderStatsQuerySerializer, OrderStatsSerializer, OrderFlatSerializer
+from apps.utils import order_stats
+from apps.utils.catalog import get_catalog_version, service_catalog
+from apps.utils.exceptions import OrderStatusConflict
+from apps.utils.search import search_orders
+from apps.views.mixins import FlatListMixin
 
 User = get_user_model()
 
@@ -14,27 +28,153 @@ User = get_user_model()
 class ServiceViewSet(ReadOnlyModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    authentication_classes = CachedJWTAuthentication,
 
+    def list(self, request, *args, **kwargs):
+        """
+        Catalog is served from the cache, If-None-Match and If-Modified-Since are answered with 304
+        before the catalog is loaded, the user comes from the user cache.
+        """
+        version = get_catalog_version()
+        etag = service_catalog.etag(version)
+        last_modified = service_catalog.last_modified(version)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = Response(service_catalog.get(version)["data"])
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        return response
 
-@extend_schema(tags=['Orders'], description="Buyurtmalarni boshqarish uchun API")
-class OrderViewSet(ModelViewSet):
-    queryset = Order.objects.select_related('service', 'client', 'worker')
+
+@extend_schema(tags=['Orders'], description="Buyurtmalarni boshqarish uchun API",
+               parameters=[
+                   OpenApiParameter('fields', str, description="Vergul bilan ajratilgan maydonlar, masalan id,status"),
+                   OpenApiParameter('service_format', str, enum=['nested', 'id'],
+                                    description="id - servis obyekti o'rniga faqat uning id si qaytadi"),
+                   OpenApiParameter('search', str, description="Servis nomi va tavsif bo'yicha qidiruv (so'z boshi "
+                                                               "bo'yicha), natijalar mosligi bo'yicha tartiblanadi"),
+               ])
+class OrderViewSet(FlatListMixin, ModelViewSet):
+    queryset = Order.objects.all()
+    pagination_class = KeysetPagination
+    # keyset pagination ordering fields are always loaded
+    always_loaded_fields = 'id', 'created_at'
 
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
+        if self.action == "bulk_transition":
+            return BulkTransitionSerializer
         return OrderSerializer
 
+    def get_requested_fields(self):
+        if self.action not in ("list", "retrieve"):
+            return None
+        fields = [name.strip() for name in self.request.query_params.get("fields", "").split(",") if name.strip()]
+        return fields or None
+
+    def is_nested_service(self) -> bool:
+        return self.request.query_params.get("service_format") != "id"
+
+    def get_flat_serializer(self):
+        return OrderFlatSerializer(fields=self.get_requested_fields(), nested_service=self.is_nested_service())
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is OrderSerializer:
+            kwargs.setdefault("fields", self.get_requested_fields())
+            kwargs.setdefault("nested_service", self.is_nested_service())
+        return super().get_serializer(*args, **kwargs)
+
+    def narrow_queryset(self, queryset):
+        """
+        Load only the columns the response needs.
+        """
+        fields = self.get_requested_fields()
+        nested_service = self.is_nested_service() and (fields is None or "service" in fields)
+        if nested_service:
+            queryset = queryset.select_related('service')
+        if fields is None:
+            return queryset.defer('search_vector')
+
+        model_fields = {field.name for field in Order._meta.concrete_fields}
+        only = set(self.always_loaded_fields) | {name for name in fields if name in model_fields}
+        if nested_service:
+            only |= {f"service__{field.name}" for field in Service._meta.concrete_fields}
+        return queryset.only(*only)
+
+    @property
+    def keyset_ordering(self):
+        if self.get_search_text():
+            return '-rank', '-id'
+        return None
+
+    def get_search_text(self) -> str:
+        if self.action != "list":
+            return ""
+        return self.request.query_params.get("search", "").strip()
+
     def get_queryset(self):
         user = self.request.user
+        queryset = self.narrow_queryset(self.queryset)
+        if search := self.get_search_text():
+            queryset = search_orders(queryset, search)
         if user.role == user.Role.ADMIN:
-            return self.queryset
+            return queryset
         if user.role == user.Role.CLIENT:
-            return self.queryset.filter(client=user)
+            return queryset.filter(client=user)
         if user.role == user.Role.WORKER:
-            return self.queryset.filter(Q(worker=user) | Q(service__name__icontains=user.specialty))
+            return queryset.filter(Q(worker=user) | Q(service_id__in=user.get_service_ids()))
         return Order.objects.none()
 
+    @extend_schema(description="Ishchi olishi mumkin bo'lgan bo'sh buyurtmalar feedi",
+                   responses=OrderSerializer(many=True))
+    @action(detail=False, methods=["get"])
+    def feed(self, request):
+        if request.user.role != User.Role.WORKER:
+            raise PermissionDenied("Feed faqat ishchilar uchun!")
+        queryset = WorkerFeedEntry.objects.filter(worker=request.user).select_related('order__service') \
+            .defer('order__search_vector')
+        paginator = KeysetPagination()
+        paginator.ordering = ('-created_at', '-order_id')
+        entries = paginator.paginate_queryset(queryset, request)
+        serializer = OrderSerializer([entry.order for entry in entries], many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @extend_schema(description="Bir nechta buyurtma holatini bitta so'rovda o'zgartirish",
+                   request=BulkTransitionSerializer)
+    @action(detail=False, methods=["post"], url_path="bulk-transition")
+    def bulk_transition(self, request):
+        if request.user.role == User.Role.CLIENT:
+            raise PermissionDenied("Mijoz buyurtma holatini o'zgartiraolmaydi!")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, status = serializer.validated_data["ids"], serializer.validated_data["status"]
+
+        changed, conflicts = Order.bulk_transition(self.get_queryset().filter(pk__in=ids), status)
+        results = {}
+        for result, orders in (("ok", changed), ("conflict", conflicts)):
+            for order in orders:
+                results[order.id] = {"id": order.id, "result": result, "status": order.status}
+        return Response({
+            "results": [results.get(order_id, {"id": order_id, "result": "not_found"}) for order_id in ids],
+        })
+
+    @extend_schema(description="Buyurtmalar statistikasi (kun, servis, ishchi, holat bo'yicha soni va summasi)",
+                   parameters=[OrderStatsQuerySerializer], responses=OrderStatsSerializer(many=True))
+    @action(detail=False, methods=["get"], permission_classes=(IsAdminRole,))
+    def stats(self, request):
+        serializer = OrderStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        queryset = OrderStat.objects.all()
+        for param, lookup in (("date_from", "day__gte"), ("date_to", "day__lte"), ("service", "service_id"),
+                              ("worker", "worker_id"), ("status", "status")):
+            if param in params:
+                queryset = queryset.filter(**{lookup: params[param]})
+        group_by = [name for name in ('day', 'service', 'worker', 'status') if name in params.get("group_by", ())]
+        rows = order_stats.summarize(queryset, group_by or ['day'])
+        return Response(OrderStatsSerializer(rows, many=True).data)
+
     def destroy(self, request, *args, **kwargs):
         if request.user.role == 'client':
             raise PermissionDenied("Mijoz buyurtmani o'chiraolmaydi!")
@@ -44,3 +184,20 @@ class OrderViewSet(ModelViewSet):
         if request.user.role == "client":
             raise PermissionDenied("Mijoz buyurtma holatini o'zgartiraolmaydi!")
         return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        """
+        Status changes go through the order state machine, other edits are saved as usual.
+        """
+        order = serializer.instance
+        status = serializer.validated_data.pop('status', order.status)
+        if status != order.status:
+            if not order.can_transition(status):
+                raise ValidationError(
+                    {"status": f"Buyurtma holatini {order.status} dan {status} ga o'zgartirib bo'lmaydi"})
+            # the other changed fields are written by the same UPDATE
+            if not order.transition(status, **serializer.validated_data):
+                raise OrderStatusConflict()
+            return
+        serializer.save()
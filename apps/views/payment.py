@@ -10,11 +10,12 @@ from rest_framework.views import APIView
 from apps.models import Transaction
 from apps.serializers import (ClickSerializer, ClickTransactionSerializer,
                               TransactionDetailModelSerializer,
-                              TransactionListModelSerializer)
+                              TransactionListModelSerializer, TransactionListFlatSerializer)
 from apps.utils.click_payment import (AUTHORIZATION_FAIL,
                                       AUTHORIZATION_FAIL_CODE, COMPLETE,
                                       PREPARE, ClickShopAPIView, click_get_qr_url)
 from apps.utils.payme_payment import GeneratePayLink, MerchantAPIView
+from apps.views.mixins import FlatListMixin
 
 
 @extend_schema(tags=['payment'],
@@ -91,9 +92,10 @@ class TransactionPaymeCheckAPIView(MerchantAPIView):
 
 
 @extend_schema(tags=['payment'])
-class TransactionListAPIVew(ListAPIView):
+class TransactionListAPIVew(FlatListMixin, ListAPIView):
     queryset = Transaction.objects.all().order_by('-created_at')
     serializer_class = TransactionListModelSerializer
+    flat_serializer_class = TransactionListFlatSerializer
     permission_classes = IsAuthenticated,
 
     def get_queryset(self):
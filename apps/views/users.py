@@ -1,14 +1,21 @@
 from django.contrib.auth import get_user_model
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import action
-from rest_framework.generics import RetrieveUpdateAPIView, ListAPIView
+from rest_framework.generics import RetrieveUpdateAPIView, ListAPIView, GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from apps.models import Notification
+from apps.paginations import KeysetPagination
 from apps.permissions import IsAdminRole
-from apps.serializers.user_serializers import UserSerializer, NotificationSerializer
+from apps.serializers import NotificationFlatSerializer
+from apps.serializers.user_serializers import UserSerializer, NotificationSerializer, MarkReadSerializer
+from apps.utils.presence import presence
+from apps.utils.unread import get_unread_count, mark_read
+from apps.utils.user_stats import get_user_stats
+from apps.views.mixins import FlatListMixin
 
 User = get_user_model()
 
@@ -29,21 +36,59 @@ class UserAdminViewSet(ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def stats(self, request):
+        stats = get_user_stats()
         return Response({
-            "Jami": User.objects.count(),
-            "Klientlar": User.objects.filter(role=User.Role.CLIENT).count(),
-            "Ishchilar": User.objects.filter(role=User.Role.WORKER).count(),
-            "Addminlar": User.objects.filter(role=User.Role.ADMIN).count(),
+            "Jami": stats["total"],
+            "Klientlar": stats["clients"],
+            "Ishchilar": stats["workers"],
+            "Addminlar": stats["admins"],
         })
 
+    @extend_schema(description="Onlayn ishchilar. ?ids=1,2,3 berilmasa barcha ishchilar tekshiriladi",
+                   responses={200: {'type': 'object',
+                                    'properties': {'online': {'type': 'array', 'items': {'type': 'integer'}}}}})
+    @action(detail=False, methods=["get"])
+    def online(self, request):
+        ids = request.query_params.get("ids")
+        if ids:
+            user_ids = [int(user_id) for user_id in ids.split(",") if user_id.strip().isdigit()]
+        else:
+            user_ids = User.objects.filter(role=User.Role.WORKER).values_list("id", flat=True)
+        return Response({"online": presence.online_among(user_ids)})
+
 
 @extend_schema(tags=['Notifications'], description="Xabarlar tarixini kuzatish uchun API")
-class NotificationViewSet(ListAPIView):
+class NotificationViewSet(FlatListMixin, ListAPIView):
     serializer_class = NotificationSerializer
+    flat_serializer_class = NotificationFlatSerializer
     permission_classes = IsAuthenticated,
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Notification.objects.select_related('sender', 'receiver')
         if user.role == user.Role.CLIENT or user.role == user.Role.WORKER:
-            return Notification.objects.filter(receiver=self.request.user).order_by("-created_at")
-        return Notification.objects.order_by("-created_at")
+            return queryset.filter(receiver=self.request.user)
+        return queryset
+
+
+@extend_schema(tags=['Notifications'], description="O'qilmagan xabarlar soni",
+               responses={200: {'type': 'object', 'properties': {'unread': {'type': 'integer'}}}})
+class NotificationUnreadCountView(APIView):
+    permission_classes = IsAuthenticated,
+
+    def get(self, request, *args, **kwargs):
+        return Response({"unread": get_unread_count(request.user.pk)})
+
+
+@extend_schema(tags=['Notifications'], description="Berilgan id gacha bo'lgan xabarlarni o'qilgan deb belgilash",
+               responses={200: {'type': 'object', 'properties': {'updated': {'type': 'integer'}}}})
+class NotificationMarkReadView(GenericAPIView):
+    serializer_class = MarkReadSerializer
+    permission_classes = IsAuthenticated,
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user.pk, serializer.validated_data['up_to'])
+        return Response({"updated": updated})
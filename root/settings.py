@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'apps.apps.AppsConfig',
     'rest_framework',
     'drf_spectacular',
@@ -115,6 +116,41 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{os.getenv('HOST')}:6379/1",
+    },
+}
+
+# Order notifications are written to the outbox table and sent after commit
+OUTBOX = {
+    'BATCH_SIZE': 100,
+    'DISPATCH_IN_THREAD': True,
+}
+
+# WebSocket handshake user cache (JWTAuthMiddleware)
+WS_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 300,
+}
+
+# Incoming WebSocket messages limits (token bucket per connection and per user)
+WS_RATE_LIMIT = {
+    'RATE': 5,
+    'BURST': 20,
+    'USER_RATE': 10,
+    'USER_BURST': 40,
+    'MAX_SEND_QUEUE': 100,
+}
+
+# Online users (heartbeat refreshed cache keys) and batched last_seen writes
+PRESENCE = {
+    'TTL': 60,
+    'FLUSH_INTERVAL': 30,
+    'BATCH_SIZE': 500,
+}
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Asia/Tashkent'
 